@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
-import json
+import heapq
 import os
+import secrets
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from decimal import Decimal, InvalidOperation
+from operator import itemgetter
 
+import orjson
 from flask import Flask, jsonify, render_template, request, url_for
 
 from .config import AppConfig, load_env
@@ -19,185 +22,384 @@ from .consent_service import (
     start_authentication,
     verify_authentication,
 )
-from .consent_ui import consent_ui_src, describe_consent_ui_jwt, generate_consent_ui_jwt
+from .consent_ui import (
+    consent_ui_src,
+    describe_consent_ui_jwt,
+    generate_consent_ui_jwt,
+    issue_ui_state,
+    verify_ui_state,
+)
+from .json_provider import OrjsonProvider
 from .mc_client import MastercardApiError, MastercardApiClient, validate_env_and_keystore
 from .notification_service import (
-    build_notification_record,
+    EVENT_TS_FIELD,
+    NOTIFICATION_SCHEMA_VERSION,
+    build_notification_records,
+    canonicalize_notifications,
+    ensure_match_key,
     ensure_notification_fingerprint,
-    enrich_notification_record,
-    notification_fingerprint,
+    notification_batch_hash,
     poll_undelivered_notifications,
+    refresh_derived_fields,
 )
 from .storage import (
-    load_enrollments,
-    load_notifications,
-    load_pending_enrollments,
-    load_pending_authentications,
+    ENROLLMENTS_FILE,
+    NOTIFICATIONS_FILE,
+    NOTIFICATIONS_LOG_FILE,
+    TRANSACTIONS_FILE,
+    build_notification_index,
+    load_enrollment_index,
+    load_notification_batch_hash,
+    load_notification_index,
+    load_notifications_versioned,
+    load_pending_enrollments_by_state,
+    load_pending_authentications_by_state,
     load_transactions,
-    save_enrollments,
+    save_enrollment_index,
     save_notifications,
-    save_pending_enrollments,
-    save_pending_authentications,
+    save_notifications_indexed,
+    save_pending_enrollments_by_state,
+    save_pending_authentications_by_state,
     save_transactions,
+    views_cached,
 )
 from .transaction_service import (
+    POSTED_SORT_FIELD,
     build_transaction_record,
+    ensure_posted_timestamp,
     generate_transaction_identifiers,
     parse_transaction_input,
     post_transaction,
 )
 
 
-def create_app(test_config: dict | None = None) -> Flask:
-    load_env()
-    app = Flask(__name__)
+TEST_CARDS = [
+    {
+        "label": "Success + 3DS challenge (PAN 2303…0297)",
+        "pan": "2303779951000297",
+        "expiry_month": 12,
+        "expiry_year": 2027,
+        "cvc": "123",
+        "cardholder_name": "John",
+    },
+    {
+        "label": "Success + 3DS frictionless (PAN 5204…9999)",
+        "pan": "5204730541009999",
+        "expiry_month": 12,
+        "expiry_year": 2027,
+        "cvc": "123",
+        "cardholder_name": "frictionless",
+    },
+    {
+        "label": "Success + 3DS not supported (PAN 5555…4444)",
+        "pan": "5555555555554444",
+        "expiry_month": 12,
+        "expiry_year": 2027,
+        "cvc": "123",
+        "cardholder_name": "John",
+    },
+    {
+        "label": "Pre-auth stolen card (PAN 5555…4242)",
+        "pan": "5555424242424242",
+        "expiry_month": 12,
+        "expiry_year": 2027,
+        "cvc": "123",
+        "cardholder_name": "John",
+    },
+    {
+        "label": "3DS auth failure (PAN 2303…0248)",
+        "pan": "2303779951000248",
+        "expiry_month": 12,
+        "expiry_year": 2027,
+        "cvc": "123",
+        "cardholder_name": "John",
+    },
+]
+
+
+_FP_STATUS_MAP = {
+    "complete": "complete",
+    "completed": "complete",
+    "success": "complete",
+    "timeout": "timeout",
+    "unavailable": "unavailable",
+    "not_available": "unavailable",
+    "notavailable": "unavailable",
+}
+_COLOR_DEPTHS = (1, 4, 8, 15, 16, 24, 32, 48)
+_COLOR_DEPTHS_SET = frozenset(_COLOR_DEPTHS)
+
+_VALID_TABS = frozenset(("enroll", "post", "dashboard"))
+_AUTH_PENDING_STATUSES = frozenset(("AUTH_READY_TO_START", "AUTH_IN_PROGRESS", "AUTH_FAILED_CAN_RETRY"))
+_AUTH_CHALLENGE_STATUSES = frozenset(("AUTH_IN_PROGRESS", "AUTH_READY_TO_START"))
+_CONSENT_UI_CLOSE_MESSAGES = frozenset(("Error", "Cancel", "Close"))
+
+# 3DS method parameter spellings seen from the Consents API, in preference order.
+_THREE_DS_METHOD_URL_KEYS = ("threeDsMethodUrl", "threeDSMethodUrl", "threeDSMethodURL")
+_THREE_DS_METHOD_NOTIFICATION_URL_KEYS = (
+    "threeDSMethodNotificationURL",
+    "threeDsMethodNotificationURL",
+    "threeDsMethodNotificationUrl",
+)
+_THREE_DS_METHOD_DATA_KEYS = ("threeDSMethodData", "threeDsMethodData")
+_THREE_DS_SERVER_TRANS_ID_KEYS = ("threeDSServerTransID", "threeDsServerTransId")
+
+# Fields a re-delivered notification may fill in on the stored record when missing there.
+_NOTIFICATION_MERGE_FIELDS = (
+    "merchant",
+    "amount",
+    "currency",
+    "event_time",
+    "card_reference",
+    "encrypted_payload",
+    "reference_number",
+    "system_trace_audit_number",
+    "trans_uid",
+    "notification_sequence_id",
+    "message_type",
+    "fingerprint",
+)
 
-    config = AppConfig.from_env()
-    app.config.update(config.as_flask_dict())
+# app.config key -> (base URL config key, env var, default base URL)
+_CLIENT_BASE_URLS = {
+    "CONSENTS_CLIENT": (
+        "CONSENTS_BASE_URL",
+        "MC_BASE_URL_CONSENTS",
+        "https://sandbox.api.mastercard.com/openapis/authentication",
+    ),
+    "TXN_CLIENT": ("TXN_BASE_URL", "MC_BASE_URL_TXN_NOTIF", "https://sandbox.api.mastercard.com/openapis"),
+}
 
-    if test_config:
-        app.config.update(test_config)
+# Dashboard data files are independent; reading them concurrently overlaps disk I/O
+# when the storage view cache misses. Renders with warm caches skip the pool, so it
+# only queues requests while files are actually being re-read.
+_DASHBOARD_FILES = (ENROLLMENTS_FILE, TRANSACTIONS_FILE, NOTIFICATIONS_FILE, NOTIFICATIONS_LOG_FILE)
+_LOAD_EXECUTOR = ThreadPoolExecutor(max_workers=3, thread_name_prefix="dashboard-load")
+
+_BOOL_MAP = {
+    "true": True,
+    "1": True,
+    "yes": True,
+    "y": True,
+    "false": False,
+    "0": False,
+    "no": False,
+    "n": False,
+}
+
+
+def _find_pending_auth(pending: dict, *, state: str | None = None) -> dict | None:
+    return pending.get(state) if state else None
+
+
+def _pop_pending_auth(pending: dict, state: str | None = None) -> dict | None:
+    return pending.pop(state, None) if state else None
 
-    test_cards = [
-        {
-            "label": "Success + 3DS challenge (PAN 2303…0297)",
-            "pan": "2303779951000297",
-            "expiry_month": 12,
-            "expiry_year": 2027,
-            "cvc": "123",
-            "cardholder_name": "John",
-        },
-        {
-            "label": "Success + 3DS frictionless (PAN 5204…9999)",
-            "pan": "5204730541009999",
-            "expiry_month": 12,
-            "expiry_year": 2027,
-            "cvc": "123",
-            "cardholder_name": "frictionless",
-        },
-        {
-            "label": "Success + 3DS not supported (PAN 5555…4444)",
-            "pan": "5555555555554444",
-            "expiry_month": 12,
-            "expiry_year": 2027,
-            "cvc": "123",
-            "cardholder_name": "John",
-        },
-        {
-            "label": "Pre-auth stolen card (PAN 5555…4242)",
-            "pan": "5555424242424242",
-            "expiry_month": 12,
-            "expiry_year": 2027,
-            "cvc": "123",
-            "cardholder_name": "John",
-        },
-        {
-            "label": "3DS auth failure (PAN 2303…0248)",
-            "pan": "2303779951000248",
-            "expiry_month": 12,
-            "expiry_year": 2027,
-            "cvc": "123",
-            "cardholder_name": "John",
-        },
-    ]
-
-    def _find_pending_auth(pending: list, *, state: str | None = None, card_reference: str | None = None):
-        for item in pending:
-            if state and item.get("state") == state:
-                return item
-            if card_reference and item.get("card_reference") == card_reference:
-                return item
+
+def _first_param(params: dict, keys: tuple[str, ...]) -> str:
+    for key in keys:
+        value = params.get(key)
+        if value not in (None, ""):
+            return value
+    return ""
+
+
+def _normalize_fingerprint_status(value: str | None) -> str:
+    if not value:
+        return "unavailable"
+    normalized = value.strip().lower()
+    return _FP_STATUS_MAP.get(normalized, normalized)
+
+
+def _parse_int(value: str | None) -> int | None:
+    if not value:
+        return None
+    text = str(value).strip()
+    # Validate up front so malformed browser fields never reach the exception path.
+    digits = text[1:] if text[:1] in ("-", "+") else text
+    if not digits.isdecimal():
         return None
+    return int(text)
+
 
-    def _pop_pending_auth(pending: list, state: str | None = None) -> dict | None:
-        for idx, item in enumerate(pending):
-            if state and item.get("state") == state:
-                return pending.pop(idx)
+def _parse_bool(value: str | None) -> bool | None:
+    if not value:
         return None
+    return _BOOL_MAP.get(str(value).strip().lower())
 
-    def _normalize_fingerprint_status(value: str | None) -> str:
-        if not value:
-            return "unavailable"
-        normalized = value.strip().lower()
-        mapping = {
-            "complete": "complete",
-            "completed": "complete",
-            "success": "complete",
-            "timeout": "timeout",
-            "unavailable": "unavailable",
-            "not_available": "unavailable",
-            "notavailable": "unavailable",
-        }
-        return mapping.get(normalized, normalized)
 
-    def _parse_int(value: str | None) -> int | None:
-        if value in (None, ""):
-            return None
-        try:
-            return int(value)
-        except (TypeError, ValueError):
-            return None
-
-    def _parse_bool(value: str | None) -> bool | None:
-        if value in (None, ""):
-            return None
-        text = str(value).strip().lower()
-        if text in {"true", "1", "yes", "y"}:
-            return True
-        if text in {"false", "0", "no", "n"}:
-            return False
+def _normalize_color_depth(value: str | None) -> int | None:
+    depth = _parse_int(value)
+    if depth is None:
         return None
+    if depth in _COLOR_DEPTHS_SET:
+        return depth
+    return min(_COLOR_DEPTHS, key=lambda candidate: abs(candidate - depth))
+
+
+def _is_loopback_ip(value: str | None) -> bool:
+    if not value:
+        return False
+    return value.startswith("127.") or value == "::1"
 
-    def _normalize_color_depth(value: str | None) -> int | None:
-        depth = _parse_int(value)
-        if depth is None:
-            return None
-        allowed = [1, 4, 8, 15, 16, 24, 32, 48]
-        if depth in allowed:
-            return depth
-        return min(allowed, key=lambda candidate: abs(candidate - depth))
-
-    def _is_loopback_ip(value: str | None) -> bool:
-        if not value:
-            return False
-        return value.startswith("127.") or value == "::1"
-
-    def _normalize_merchant_name(value: str | None) -> str | None:
-        if not value:
-            return None
-        text = str(value).strip()
-        if not text:
-            return None
-        return text[:40]
-
-    def _find_enrollment_index(enrollments: list, record: dict) -> int | None:
-        record_ref = record.get("card_reference")
-        if record_ref:
-            for idx, existing in enumerate(enrollments):
-                if existing.get("card_reference") == record_ref:
-                    return idx
-        record_last4 = record.get("pan_last4")
-        record_alias = record.get("card_alias")
-        if record_last4:
-            for idx, existing in enumerate(enrollments):
-                if existing.get("pan_last4") != record_last4:
-                    continue
-                if record_alias and existing.get("card_alias") and existing.get("card_alias") != record_alias:
-                    continue
-                return idx
-        record_consent = record.get("consent_id") or record.get("id")
-        if record_consent:
-            for idx, existing in enumerate(enrollments):
-                if existing.get("consent_id") == record_consent or existing.get("id") == record_consent:
-                    return idx
+
+def _normalize_merchant_name(value: str | None) -> str | None:
+    if not value:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    return text[:40]
+
+
+def _filter_notifications(notifications: list, transactions: list) -> tuple[list, str, bool]:
+    if not transactions:
+        return notifications, "all notifications", False
+
+    reference_numbers = {
+        str(txn.get("reference_number")).strip()
+        for txn in transactions
+        if txn.get("reference_number")
+    }
+    stan_numbers = {
+        str(txn.get("system_trace_audit_number")).strip()
+        for txn in transactions
+        if txn.get("system_trace_audit_number")
+    }
+    fallback_keys = {
+        key
+        for txn in transactions
+        for key in (ensure_match_key(txn),)
+        if key is not None
+    }
+
+    if not reference_numbers and not stan_numbers and not fallback_keys:
+        return notifications, "all notifications", False
+
+    filtered: list = []
+    for note in notifications:
+        ref = note.get("reference_number")
+        if ref and str(ref).strip() in reference_numbers:
+            filtered.append(note)
+            continue
+        stan = note.get("system_trace_audit_number")
+        if stan and str(stan).strip() in stan_numbers:
+            filtered.append(note)
+            continue
+        key = ensure_match_key(note)
+        if key and key in fallback_keys:
+            filtered.append(note)
+
+    return filtered, "filtered to UI-posted transactions", True
+
+
+def _merge_notifications(new_records: list, *, batch_hash: int, data_dir: str | os.PathLike | None) -> None:
+    existing, existing_version = load_notifications_versioned(base_dir=data_dir)
+    # Positions of records added or updated by this poll; None forces a full rewrite.
+    changed_positions: set | None = set()
+    if existing_version < NOTIFICATION_SCHEMA_VERSION:
+        existing, _ = canonicalize_notifications(existing)
+        id_index, fingerprint_index = build_notification_index(existing)
+        changed_positions = None
+    else:
+        id_index, fingerprint_index = load_notification_index(existing, base_dir=data_dir)
+
+    for record in new_records:
+        if not record.get("fingerprint"):
+            ensure_notification_fingerprint(record)
+        record_id = record.get("id")
+        fingerprint = record.get("fingerprint")
+
+        position = None
+        if record_id and str(record_id) in id_index:
+            position = id_index[str(record_id)]
+        elif fingerprint and fingerprint in fingerprint_index:
+            position = fingerprint_index[fingerprint]
+
+        if position is not None:
+            current = existing[position]
+            updates = {
+                field: record[field]
+                for field in _NOTIFICATION_MERGE_FIELDS
+                if not current.get(field) and record.get(field) is not None
+            }
+            if record.get("payload") and not current.get("payload"):
+                updates["payload"] = record["payload"]
+            if not updates:
+                continue
+            # Derived fields only depend on the merged ones, so untouched records skip this.
+            current.update(updates)
+            refresh_derived_fields(current)
+            if current.get("fingerprint"):
+                fingerprint_index.setdefault(current["fingerprint"], position)
+            if changed_positions is not None:
+                changed_positions.add(position)
+            continue
+
+        position = len(existing)
+        existing.append(record)
+        if record_id:
+            id_index[str(record_id)] = position
+        if fingerprint:
+            fingerprint_index[fingerprint] = position
+        if changed_positions is not None:
+            changed_positions.add(position)
+    save_notifications_indexed(
+        existing,
+        id_index,
+        fingerprint_index,
+        base_dir=data_dir,
+        version=NOTIFICATION_SCHEMA_VERSION,
+        changed=None if changed_positions is None else [existing[idx] for idx in sorted(changed_positions)],
+        batch_hash=batch_hash,
+    )
+
+
+def _request_json() -> dict | None:
+    if not request.is_json:
         return None
+    try:
+        payload = orjson.loads(request.get_data(cache=True))
+    except orjson.JSONDecodeError:
+        return None
+    return payload if isinstance(payload, dict) else None
 
-    def _upsert_enrollment(enrollments: list, record: dict) -> None:
-        idx = _find_enrollment_index(enrollments, record)
-        if idx is None:
-            enrollments.append(record)
-        else:
-            enrollments[idx] = {**enrollments[idx], **record}
+
+def create_app(test_config: dict | None = None) -> Flask:
+    load_env()
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+
+    config = AppConfig.from_env()
+    app.config.update(config.as_flask_dict())
+
+    if test_config:
+        app.config.update(test_config)
+
+    def _api_client(config_key: str) -> MastercardApiClient:
+        client = app.config.get(config_key)
+        if client is None:
+            validate_env_and_keystore()
+            base_url_key, env_key, default_url = _CLIENT_BASE_URLS[config_key]
+            base_url = app.config.get(base_url_key) or os.getenv(env_key, default_url)
+            # Both APIs live on the same host; share one session so they reuse its
+            # keep-alive connections instead of each opening their own.
+            existing = next(
+                (c for c in map(app.config.get, _CLIENT_BASE_URLS) if isinstance(c, MastercardApiClient)),
+                None,
+            )
+            client = MastercardApiClient.from_env(base_url, session=existing.session if existing else None)
+            app.config[config_key] = client
+        return client
+
+    if not app.config.get("TESTING"):
+        # Load the keystore once at startup; if credentials are not configured yet,
+        # handlers retry lazily and surface the error per request as before.
+        for config_key in _CLIENT_BASE_URLS:
+            try:
+                _api_client(config_key)
+            except (OSError, ValueError):
+                break
 
     def _finalize_enrollment_from_pending(
         pending: dict,
@@ -206,7 +408,7 @@ def create_app(test_config: dict | None = None) -> Flask:
         auth_status: str | None,
     ) -> None:
         data_dir = app.config.get("DATA_DIR")
-        enrollments = load_enrollments(base_dir=data_dir)
+        enrollments = load_enrollment_index(base_dir=data_dir)
         record = {
             "id": pending.get("consent_id"),
             "consent_id": pending.get("consent_id"),
@@ -217,175 +419,71 @@ def create_app(test_config: dict | None = None) -> Flask:
             "auth_status": auth_status,
             "created_at": datetime.now(timezone.utc).isoformat(),
         }
-        _upsert_enrollment(enrollments, record)
-        save_enrollments(enrollments, base_dir=data_dir)
-
-    def _normalize_amount(value: object) -> str | None:
-        if value in (None, ""):
-            return None
-        try:
-            return str(Decimal(str(value)).normalize())
-        except (InvalidOperation, ValueError):
-            return str(value).strip()
-
-    def _normalize_text(value: object) -> str | None:
-        if value in (None, ""):
-            return None
-        return str(value).strip().upper()
-
-    def _parse_timestamp(value: object) -> float:
-        if value in (None, ""):
-            return 0.0
-        if isinstance(value, (int, float)):
-            return float(value)
-        if isinstance(value, str):
-            text = value.strip()
-            if not text:
-                return 0.0
-            if text.endswith("Z"):
-                text = text[:-1] + "+00:00"
-            if len(text) >= 5 and text[-5] in "+-" and text[-2:].isdigit() and text[-4:-2].isdigit():
-                if text[-3] != ":":
-                    text = text[:-2] + ":" + text[-2:]
-            try:
-                return datetime.fromisoformat(text).timestamp()
-            except ValueError:
-                for fmt in ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z"):
-                    try:
-                        return datetime.strptime(text, fmt).timestamp()
-                    except ValueError:
-                        continue
-        return 0.0
-
-    def _notification_match_key(item: dict) -> tuple[str, str, str, str] | None:
-        card_ref = item.get("card_reference") or item.get("consent_id")
-        amount = _normalize_amount(item.get("amount"))
-        currency = _normalize_text(item.get("currency"))
-        merchant = _normalize_text(item.get("merchant"))
-        if card_ref and amount and currency and merchant:
-            return (str(card_ref).strip(), amount, currency, merchant)
-        return None
-
-    def _filter_notifications(notifications: list, transactions: list) -> tuple[list, str, bool]:
-        if not transactions:
-            return notifications, "all notifications", False
-
-        reference_numbers = {
-            str(txn.get("reference_number")).strip()
-            for txn in transactions
-            if txn.get("reference_number")
-        }
-        stan_numbers = {
-            str(txn.get("system_trace_audit_number")).strip()
-            for txn in transactions
-            if txn.get("system_trace_audit_number")
-        }
-        fallback_keys = {
-            key
-            for txn in transactions
-            for key in (_notification_match_key(txn),)
-            if key is not None
-        }
-
-        if not reference_numbers and not stan_numbers and not fallback_keys:
-            return notifications, "all notifications", False
-
-        filtered: list = []
-        for note in notifications:
-            ref = note.get("reference_number")
-            if ref and str(ref).strip() in reference_numbers:
-                filtered.append(note)
-                continue
-            stan = note.get("system_trace_audit_number")
-            if stan and str(stan).strip() in stan_numbers:
-                filtered.append(note)
-                continue
-            key = _notification_match_key(note)
-            if key and key in fallback_keys:
-                filtered.append(note)
-
-        return filtered, "filtered to UI-posted transactions", True
-
-    def _dedupe_notifications(notifications: list) -> tuple[list, bool]:
-        deduped: list = []
-        seen: set[str] = set()
-        changed = False
-        for note in notifications:
-            key = note.get("fingerprint") or notification_fingerprint(note) or note.get("id")
-            if not key:
-                deduped.append(note)
-                continue
-            key_str = str(key)
-            if key_str in seen:
-                changed = True
-                continue
-            seen.add(key_str)
-            deduped.append(note)
-        return deduped, changed
+        enrollments.upsert(record)
+        save_enrollment_index(enrollments, base_dir=data_dir)
 
     def render_index(active_tab: str, post_result: dict | None = None) -> str:
         data_dir = app.config.get("DATA_DIR")
-        enrollments = load_enrollments(base_dir=data_dir)
-        transactions = load_transactions(base_dir=data_dir)
-        notifications = load_notifications(base_dir=data_dir)
-        updated = False
-        for note in notifications:
-            if enrich_notification_record(note):
-                updated = True
-            if not note.get("fingerprint"):
-                if ensure_notification_fingerprint(note):
-                    updated = True
-        notifications, deduped = _dedupe_notifications(notifications)
-        if deduped:
-            updated = True
-        if updated:
-            save_notifications(notifications, base_dir=data_dir)
-
-        transactions_sorted = sorted(
-            transactions,
-            key=lambda item: _parse_timestamp(item.get("posted_at") or item.get("created_at")),
-            reverse=True,
-        )
+        if views_cached(_DASHBOARD_FILES, base_dir=data_dir):
+            enrollment_index = load_enrollment_index(base_dir=data_dir)
+            transactions = load_transactions(base_dir=data_dir)
+            notifications, notifications_version = load_notifications_versioned(base_dir=data_dir)
+        else:
+            enrollment_future = _LOAD_EXECUTOR.submit(load_enrollment_index, base_dir=data_dir)
+            transactions_future = _LOAD_EXECUTOR.submit(load_transactions, base_dir=data_dir)
+            notifications_future = _LOAD_EXECUTOR.submit(load_notifications_versioned, base_dir=data_dir)
+            enrollment_index = enrollment_future.result()
+            transactions = transactions_future.result()
+            notifications, notifications_version = notifications_future.result()
+
+        # Records written before timestamps were cached get them once, then persist.
+        if any([ensure_posted_timestamp(txn) for txn in transactions]):
+            save_transactions(transactions, base_dir=data_dir)
+        if notifications and notifications_version < NOTIFICATION_SCHEMA_VERSION:
+            notifications, _ = canonicalize_notifications(notifications)
+            save_notifications(notifications, base_dir=data_dir, version=NOTIFICATION_SCHEMA_VERSION)
+
+        transactions_sorted = sorted(transactions, key=itemgetter(POSTED_SORT_FIELD))
 
         notifications_total = len(notifications)
-        notifications_filtered, filter_label, filter_active = _filter_notifications(
-            notifications, transactions_sorted
-        )
-        notifications_sorted = sorted(
-            notifications_filtered,
-            key=lambda item: _parse_timestamp(
-                item.get("event_time") or item.get("received_at") or item.get("created_at")
-            ),
-            reverse=True,
-        )
-        notifications_filtered_total = len(notifications_sorted)
+        # Only the dashboard shows the notification table; other tabs need the count alone.
+        notifications_loaded = active_tab == "dashboard"
+        if notifications_loaded:
+            notifications_filtered, filter_label, filter_active = _filter_notifications(
+                notifications, transactions_sorted
+            )
+            notifications_filtered_total = len(notifications_filtered)
+
+            page_size = 8
+            page_raw = request.args.get("notif_page", "1")
+            try:
+                page = int(page_raw)
+            except ValueError:
+                page = 1
+            if page < 1:
+                page = 1
+            total_pages = max(1, (notifications_filtered_total + page_size - 1) // page_size)
+            if page > total_pages:
+                page = total_pages
+            start_index = (page - 1) * page_size
+            end_index = min(start_index + page_size, notifications_filtered_total)
+            # Partial sort: only the rows up to the end of the requested page are ordered.
+            newest = heapq.nlargest(end_index, notifications_filtered, key=itemgetter(EVENT_TS_FIELD))
+            notifications_page = newest[start_index:]
+        else:
+            notifications_page = []
+            notifications_filtered_total = 0
+            filter_label = ""
+            filter_active = False
+            page = total_pages = 1
+            start_index = end_index = 0
 
-        page_size = 8
-        page_raw = request.args.get("notif_page", "1")
-        try:
-            page = int(page_raw)
-        except ValueError:
-            page = 1
-        if page < 1:
-            page = 1
-        total_pages = max(1, (notifications_filtered_total + page_size - 1) // page_size)
-        if page > total_pages:
-            page = total_pages
-        start_index = (page - 1) * page_size
-        end_index = min(start_index + page_size, notifications_filtered_total)
-        notifications_page = notifications_sorted[start_index:end_index]
-
-        card_labels = {}
-        for enrollment in enrollments:
-            ref = enrollment.get("card_reference") or enrollment.get("consent_id")
-            if not ref:
-                continue
-            card_labels[ref] = enrollment.get("card_alias") or ref
         return render_template(
             "index.html",
-            enrollments=enrollments,
+            enrollments=enrollment_index.items,
             transactions=transactions_sorted,
             notifications=notifications_page,
+            notifications_loaded=notifications_loaded,
             notifications_total=notifications_total,
             notifications_filtered_total=notifications_filtered_total,
             notifications_filter_label=filter_label,
@@ -395,15 +493,15 @@ def create_app(test_config: dict | None = None) -> Flask:
             notifications_page_start=0 if notifications_filtered_total == 0 else start_index + 1,
             notifications_page_end=end_index,
             active_tab=active_tab,
-            test_cards=test_cards,
+            test_cards=TEST_CARDS,
             post_result=post_result,
-            card_labels=card_labels,
+            card_labels=enrollment_index.card_labels,
         )
 
     @app.get("/")
     def index():
         active_tab = request.args.get("tab", "enroll")
-        if active_tab not in {"enroll", "post", "dashboard"}:
+        if active_tab not in _VALID_TABS:
             active_tab = "enroll"
         return render_index(active_tab)
 
@@ -417,20 +515,14 @@ def create_app(test_config: dict | None = None) -> Flask:
 
     @app.post("/enroll/api")
     def enroll_api():
-        payload = request.get_json(silent=True) or {}
+        payload = _request_json() or {}
         consent_name = payload.get("consent_name") or "notification"
         try:
             card = parse_card_details(payload)
         except ValueError as exc:
             return jsonify({"success": False, "message": str(exc)}), 400
 
-        client = app.config.get("CONSENTS_CLIENT")
-        if client is None:
-            validate_env_and_keystore()
-            base_url = app.config.get("CONSENTS_BASE_URL") or os.getenv(
-                "MC_BASE_URL_CONSENTS", "https://sandbox.api.mastercard.com/openapis/authentication"
-            )
-            client = MastercardApiClient.from_env(base_url)
+        client = _api_client("CONSENTS_CLIENT")
 
         try:
             result = enroll_card_via_api(client, card, consent_name=consent_name)
@@ -453,29 +545,23 @@ def create_app(test_config: dict | None = None) -> Flask:
         auth_type = auth_details.auth_type
         auth_status = auth_details.auth_status
 
-        if auth_type == "THREEDS" and auth_status in {
-            "AUTH_READY_TO_START",
-            "AUTH_IN_PROGRESS",
-            "AUTH_FAILED_CAN_RETRY",
-        }:
+        if auth_type == "THREEDS" and auth_status in _AUTH_PENDING_STATUSES:
             data_dir = app.config.get("DATA_DIR")
-            pending_auths = load_pending_authentications(base_dir=data_dir)
-            state = os.urandom(16).hex()
-            pending_auths.append(
-                {
-                    "state": state,
-                    "card_reference": result.card_reference,
-                    "consent_id": result.consent_id,
-                    "card_alias": build_enrollment_record(result, card).get("card_alias"),
-                    "pan_last4": card.pan[-4:],
-                    "consent_status": result.consent_status,
-                    "auth_type": auth_type,
-                    "auth_status": auth_status,
-                    "auth_params": auth_details.auth_params or {},
-                    "created_at": int(time.time()),
-                }
-            )
-            save_pending_authentications(pending_auths, base_dir=data_dir)
+            pending_auths = load_pending_authentications_by_state(base_dir=data_dir)
+            state = secrets.token_hex(16)
+            pending_auths[state] = {
+                "state": state,
+                "card_reference": result.card_reference,
+                "consent_id": result.consent_id,
+                "card_alias": build_enrollment_record(result, card).get("card_alias"),
+                "pan_last4": card.pan[-4:],
+                "consent_status": result.consent_status,
+                "auth_type": auth_type,
+                "auth_status": auth_status,
+                "auth_params": auth_details.auth_params or {},
+                "created_at": int(time.time()),
+            }
+            save_pending_authentications_by_state(pending_auths, base_dir=data_dir)
             return (
                 jsonify(
                     {
@@ -489,10 +575,10 @@ def create_app(test_config: dict | None = None) -> Flask:
             )
 
         data_dir = app.config.get("DATA_DIR")
-        enrollments = load_enrollments(base_dir=data_dir)
+        enrollments = load_enrollment_index(base_dir=data_dir)
         record = build_enrollment_record(result, card)
-        _upsert_enrollment(enrollments, record)
-        save_enrollments(enrollments, base_dir=data_dir)
+        enrollments.upsert(record)
+        save_enrollment_index(enrollments, base_dir=data_dir)
 
         return (
             jsonify(
@@ -513,28 +599,18 @@ def create_app(test_config: dict | None = None) -> Flask:
             return "Missing state", 400
 
         data_dir = app.config.get("DATA_DIR")
-        pending_auths = load_pending_authentications(base_dir=data_dir)
+        pending_auths = load_pending_authentications_by_state(base_dir=data_dir)
         pending = _find_pending_auth(pending_auths, state=state)
         if not pending:
             return "Unknown state", 404
 
         params = pending.get("auth_params") or {}
-
-        def _param(*keys):
-            for key in keys:
-                value = params.get(key)
-                if value not in (None, ""):
-                    return value
-            return ""
-
         return render_template(
             "3ds_fingerprint.html",
-            three_ds_method_url=_param("threeDsMethodUrl", "threeDSMethodUrl", "threeDSMethodURL"),
-            three_ds_method_notification_url=_param(
-                "threeDSMethodNotificationURL", "threeDsMethodNotificationURL", "threeDsMethodNotificationUrl"
-            ),
-            three_ds_method_data=_param("threeDSMethodData", "threeDsMethodData"),
-            three_ds_server_trans_id=_param("threeDSServerTransID", "threeDsServerTransId"),
+            three_ds_method_url=_first_param(params, _THREE_DS_METHOD_URL_KEYS),
+            three_ds_method_notification_url=_first_param(params, _THREE_DS_METHOD_NOTIFICATION_URL_KEYS),
+            three_ds_method_data=_first_param(params, _THREE_DS_METHOD_DATA_KEYS),
+            three_ds_server_trans_id=_first_param(params, _THREE_DS_SERVER_TRANS_ID_KEYS),
             state=state,
             start_auth_url=url_for("enroll_3ds_start_authentication"),
         )
@@ -546,7 +622,7 @@ def create_app(test_config: dict | None = None) -> Flask:
             return "Missing state", 400
 
         data_dir = app.config.get("DATA_DIR")
-        pending_auths = load_pending_authentications(base_dir=data_dir)
+        pending_auths = load_pending_authentications_by_state(base_dir=data_dir)
         pending = _find_pending_auth(pending_auths, state=state)
         if not pending:
             return "Unknown state", 404
@@ -586,13 +662,7 @@ def create_app(test_config: dict | None = None) -> Flask:
                 auth_params["browserIP"] = browser_ip
         auth_params = {key: value for key, value in auth_params.items() if value not in (None, "")}
 
-        client = app.config.get("CONSENTS_CLIENT")
-        if client is None:
-            validate_env_and_keystore()
-            base_url = app.config.get("CONSENTS_BASE_URL") or os.getenv(
-                "MC_BASE_URL_CONSENTS", "https://sandbox.api.mastercard.com/openapis/authentication"
-            )
-            client = MastercardApiClient.from_env(base_url)
+        client = _api_client("CONSENTS_CLIENT")
 
         try:
             response = start_authentication(client, pending["card_reference"], auth_type, auth_params)
@@ -608,7 +678,7 @@ def create_app(test_config: dict | None = None) -> Flask:
                     "3ds_result.html",
                     success=False,
                     message=f"Start authentication failed ({exc.reason_code or exc.status_code})",
-                    details=json.dumps(detail_payload, indent=2, sort_keys=True),
+                    details=orjson.dumps(detail_payload, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS).decode(),
                 ),
                 502,
             )
@@ -621,7 +691,7 @@ def create_app(test_config: dict | None = None) -> Flask:
                 auth_status=auth.auth_status,
             )
             _pop_pending_auth(pending_auths, state=state)
-            save_pending_authentications(pending_auths, base_dir=data_dir)
+            save_pending_authentications_by_state(pending_auths, base_dir=data_dir)
             return render_template(
                 "3ds_result.html",
                 success=True,
@@ -629,7 +699,7 @@ def create_app(test_config: dict | None = None) -> Flask:
                 details=None,
             )
 
-        if auth.auth_status in {"AUTH_IN_PROGRESS", "AUTH_READY_TO_START"}:
+        if auth.auth_status in _AUTH_CHALLENGE_STATUSES:
             params = auth.auth_params or {}
             acs_url = params.get("acsUrl")
             encoded_creq = params.get("encodedCReq") or params.get("encodedCreq")
@@ -661,20 +731,14 @@ def create_app(test_config: dict | None = None) -> Flask:
             return "Missing state", 400
 
         data_dir = app.config.get("DATA_DIR")
-        pending_auths = load_pending_authentications(base_dir=data_dir)
+        pending_auths = load_pending_authentications_by_state(base_dir=data_dir)
         pending = _find_pending_auth(pending_auths, state=state)
         if not pending:
             return "Unknown state", 404
 
         auth_type = pending.get("auth_type") or "THREEDS"
 
-        client = app.config.get("CONSENTS_CLIENT")
-        if client is None:
-            validate_env_and_keystore()
-            base_url = app.config.get("CONSENTS_BASE_URL") or os.getenv(
-                "MC_BASE_URL_CONSENTS", "https://sandbox.api.mastercard.com/openapis/authentication"
-            )
-            client = MastercardApiClient.from_env(base_url)
+        client = _api_client("CONSENTS_CLIENT")
 
         try:
             response = verify_authentication(client, pending["card_reference"], auth_type, {})
@@ -700,7 +764,7 @@ def create_app(test_config: dict | None = None) -> Flask:
                 auth_status=auth.auth_status,
             )
             _pop_pending_auth(pending_auths, state=state)
-            save_pending_authentications(pending_auths, base_dir=data_dir)
+            save_pending_authentications_by_state(pending_auths, base_dir=data_dir)
             return render_template(
                 "3ds_result.html",
                 success=True,
@@ -717,7 +781,7 @@ def create_app(test_config: dict | None = None) -> Flask:
 
     @app.post("/transactions")
     def post_transactions():
-        payload = request.get_json(silent=True)
+        payload = _request_json()
         if payload is None:
             payload = request.form.to_dict()
 
@@ -730,18 +794,11 @@ def create_app(test_config: dict | None = None) -> Flask:
             return render_index("post", post_result=error), 400
 
         data_dir = app.config.get("DATA_DIR")
-        enrollments = load_enrollments(base_dir=data_dir)
-        match = next((item for item in enrollments if item.get("card_reference") == txn_input.card_reference), None)
+        match = load_enrollment_index(base_dir=data_dir).get_by_card_reference(txn_input.card_reference)
         consent_id = match.get("consent_id") if match else None
         card_alias = match.get("card_alias") if match else None
 
-        client = app.config.get("TXN_CLIENT")
-        if client is None:
-            validate_env_and_keystore()
-            base_url = app.config.get("TXN_BASE_URL") or os.getenv(
-                "MC_BASE_URL_TXN_NOTIF", "https://sandbox.api.mastercard.com/openapis"
-            )
-            client = MastercardApiClient.from_env(base_url)
+        client = _api_client("TXN_CLIENT")
 
         try:
             identifiers = generate_transaction_identifiers()
@@ -810,13 +867,7 @@ def create_app(test_config: dict | None = None) -> Flask:
             except ValueError:
                 after_value = None
 
-        client = app.config.get("TXN_CLIENT")
-        if client is None:
-            validate_env_and_keystore()
-            base_url = app.config.get("TXN_BASE_URL") or os.getenv(
-                "MC_BASE_URL_TXN_NOTIF", "https://sandbox.api.mastercard.com/openapis"
-            )
-            client = MastercardApiClient.from_env(base_url)
+        client = _api_client("TXN_CLIENT")
 
         try:
             result = poll_undelivered_notifications(
@@ -837,59 +888,19 @@ def create_app(test_config: dict | None = None) -> Flask:
                 502,
             )
 
-        new_records = [build_notification_record(item) for item in result.notifications]
-        existing = load_notifications(base_dir=data_dir)
-        existing_map = {item.get("id"): item for item in existing if item.get("id")}
-        existing_fingerprint_map = {}
-        for item in existing:
-            if not item.get("fingerprint"):
-                ensure_notification_fingerprint(item)
-            fingerprint = item.get("fingerprint")
-            if fingerprint:
-                existing_fingerprint_map[fingerprint] = item
-
-        for record in new_records:
-            if not record.get("fingerprint"):
-                ensure_notification_fingerprint(record)
-            record_id = record.get("id")
-            fingerprint = record.get("fingerprint")
-
-            current = None
-            if record_id and record_id in existing_map:
-                current = existing_map[record_id]
-            elif fingerprint and fingerprint in existing_fingerprint_map:
-                current = existing_fingerprint_map[fingerprint]
-
-            if current:
-                for field in (
-                    "merchant",
-                    "amount",
-                    "currency",
-                    "event_time",
-                    "card_reference",
-                    "encrypted_payload",
-                    "reference_number",
-                    "system_trace_audit_number",
-                    "trans_uid",
-                    "notification_sequence_id",
-                    "message_type",
-                    "fingerprint",
-                ):
-                    if not current.get(field) and record.get(field) is not None:
-                        current[field] = record[field]
-                if record.get("payload") and not current.get("payload"):
-                    current["payload"] = record["payload"]
-                continue
-
-            existing.append(record)
-        save_notifications(existing, base_dir=data_dir)
+        # A poll that returns the same raw batch as the last merge, with the store untouched
+        # since, would merge to the same result; skip the rebuild and the write.
+        batch_hash = notification_batch_hash(result.notifications)
+        if batch_hash != load_notification_batch_hash(base_dir=data_dir):
+            new_records = build_notification_records(result.notifications)
+            _merge_notifications(new_records, batch_hash=batch_hash, data_dir=data_dir)
 
         response_payload = {
             "success": result.found if card_reference else True,
             "message": result.message,
             "attempts": result.attempts,
             "found": result.found,
-            "stored": len(new_records),
+            "stored": len(result.notifications),
         }
         status_code = 200 if response_payload["success"] or not card_reference else 404
         return jsonify(response_payload), status_code
@@ -897,10 +908,10 @@ def create_app(test_config: dict | None = None) -> Flask:
     @app.get("/enroll/ui/start")
     def enroll_ui_start():
         data_dir = app.config.get("DATA_DIR")
-        state = os.urandom(16).hex()
-        pending = load_pending_enrollments(base_dir=data_dir)
-        pending.append({"state": state, "created_at": int(time.time()), "return_url": request.url_root})
-        save_pending_enrollments(pending, base_dir=data_dir)
+        state = issue_ui_state(app.config["SECRET_KEY"])
+        pending = load_pending_enrollments_by_state(base_dir=data_dir)
+        pending[state] = {"state": state, "created_at": int(time.time()), "return_url": request.url_root}
+        save_pending_enrollments_by_state(pending, base_dir=data_dir)
         frame_url = url_for("enroll_ui_frame", state=state)
 
         return render_template("consent_ui_wrapper.html", frame_url=frame_url)
@@ -911,11 +922,11 @@ def create_app(test_config: dict | None = None) -> Flask:
         if not state:
             return "Missing state", 400
 
-        data_dir = app.config.get("DATA_DIR")
-        pending = load_pending_enrollments(base_dir=data_dir)
-        match = next((item for item in pending if item.get("state") == state), None)
-        if not match:
-            return "Unknown state", 404
+        # Signed states prove themselves; only legacy random states need the pending store.
+        if not verify_ui_state(state, app.config["SECRET_KEY"]):
+            pending = load_pending_enrollments_by_state(base_dir=app.config.get("DATA_DIR"))
+            if state not in pending:
+                return "Unknown state", 404
 
         callback_origin = request.url_root.rstrip("/")
         callback_url = callback_origin + "/enroll/ui/callback"
@@ -932,25 +943,30 @@ def create_app(test_config: dict | None = None) -> Flask:
 
     @app.post("/enroll/ui/callback")
     def enroll_ui_callback():
-        payload = request.get_json(silent=True) or {}
+        payload = _request_json() or {}
         state = payload.get("state")
         message = payload.get("message") or {}
 
         if not state:
             return jsonify({"success": False, "message": "Missing state"}), 400
 
+        msg_type = message.get("type")
+        msg_data = message.get("data") or {}
+
+        # Intermediate UI messages for a signed state need no storage. Terminal ones
+        # still consume the pending entry so a state completes an enrollment only once.
+        if msg_type not in _CONSENT_UI_CLOSE_MESSAGES and verify_ui_state(state, app.config["SECRET_KEY"]):
+            return jsonify({"success": True, "message": "Message received"})
+
         data_dir = app.config.get("DATA_DIR")
-        pending = load_pending_enrollments(base_dir=data_dir)
-        match = next((item for item in pending if item.get("state") == state), None)
+        pending = load_pending_enrollments_by_state(base_dir=data_dir)
+        match = pending.get(state)
         if not match:
             return jsonify({"success": False, "message": "Unknown state"}), 404
 
-        msg_type = message.get("type")
-        msg_data = message.get("data") or {}
-
         if msg_type == "Close" and msg_data.get("status") == "success":
             card_reference = msg_data.get("cardReference")
-            enrollments = load_enrollments(base_dir=data_dir)
+            enrollments = load_enrollment_index(base_dir=data_dir)
             record = {
                 "id": card_reference,
                 "consent_id": None,
@@ -961,16 +977,16 @@ def create_app(test_config: dict | None = None) -> Flask:
                 "auth_status": None,
                 "created_at": int(time.time()),
             }
-            _upsert_enrollment(enrollments, record)
-            save_enrollments(enrollments, base_dir=data_dir)
+            enrollments.upsert(record)
+            save_enrollment_index(enrollments, base_dir=data_dir)
 
-            pending = [item for item in pending if item.get("state") != state]
-            save_pending_enrollments(pending, base_dir=data_dir)
+            pending.pop(state, None)
+            save_pending_enrollments_by_state(pending, base_dir=data_dir)
             return jsonify({"success": True, "message": "Enrollment completed", "card_reference": card_reference})
 
-        if msg_type in {"Error", "Cancel", "Close"}:
-            pending = [item for item in pending if item.get("state") != state]
-            save_pending_enrollments(pending, base_dir=data_dir)
+        if msg_type in _CONSENT_UI_CLOSE_MESSAGES:
+            pending.pop(state, None)
+            save_pending_enrollments_by_state(pending, base_dir=data_dir)
             return jsonify({"success": False, "message": msg_data.get("errorMessage") or msg_type})
 
         return jsonify({"success": True, "message": "Message received"})
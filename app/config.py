@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+import secrets
 from dataclasses import dataclass
 from typing import Iterable, List
 
@@ -19,13 +20,17 @@ class AppConfig:
     app_name: str = "Consents & Transaction Notifications Demo"
     env: str = "development"
     debug: bool = True
+    secret_key: str | None = None
 
     @classmethod
     def from_env(cls) -> "AppConfig":
         env = os.getenv("FLASK_ENV", "development")
         debug = os.getenv("FLASK_DEBUG", "1") == "1"
         app_name = os.getenv("APP_NAME", cls.app_name)
-        return cls(app_name=app_name, env=env, debug=debug)
+        # Without a configured key, a per-process one is generated; signed state tokens
+        # then stop verifying across restarts and callers fall back to the pending store.
+        secret_key = os.getenv("FLASK_SECRET_KEY") or secrets.token_hex(32)
+        return cls(app_name=app_name, env=env, debug=debug, secret_key=secret_key)
 
     @staticmethod
     def validate_required(required: Iterable[str]) -> None:
@@ -38,4 +43,5 @@ class AppConfig:
             "ENV": self.env,
             "DEBUG": self.debug,
             "APP_NAME": self.app_name,
+            "SECRET_KEY": self.secret_key,
         }
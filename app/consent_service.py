@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
 from .encryption import encrypt_payload_if_configured
-from .mc_client import MastercardApiClient
+from .mc_client import MastercardApiClient, parse_json
 
 
 @dataclass
@@ -39,23 +39,34 @@ class AuthDetails:
     auth_params: dict | None
 
 
+def _digits(value: Any, length: int) -> str | None:
+    """Return ``value`` as a string of exactly ``length`` ASCII digits, or None."""
+    text = value if isinstance(value, str) else str(value)
+    if len(text) != length:
+        # Only pay for strip() when the length is off; clean input is used as-is.
+        text = text.strip()
+    if len(text) == length and text.isascii() and text.isdigit():
+        return text
+    return None
+
+
 def parse_card_details(payload: Dict[str, Any]) -> CardDetails:
     required = ["pan", "expiry_month", "expiry_year", "cvc", "cardholder_name"]
     missing = [key for key in required if key not in payload or payload[key] in (None, "")]
     if missing:
         raise ValueError(f"Missing required fields: {', '.join(missing)}")
 
-    pan = str(payload["pan"]).strip()
-    cvc = str(payload["cvc"]).strip()
+    pan = _digits(payload["pan"], 16)
+    if pan is None:
+        raise ValueError("PAN must be 16 digits")
+    cvc = _digits(payload["cvc"], 3)
+    if cvc is None:
+        raise ValueError("CVC must be 3 digits")
     cardholder_name = str(payload["cardholder_name"]).strip()
 
     expiry_month = int(payload["expiry_month"])
     expiry_year = int(payload["expiry_year"])
 
-    if len(pan) != 16:
-        raise ValueError("PAN must be 16 digits")
-    if len(cvc) != 3:
-        raise ValueError("CVC must be 3 digits")
     if not (1 <= expiry_month <= 12):
         raise ValueError("expiry_month must be 1-12")
     if expiry_year < 2021:
@@ -129,7 +140,7 @@ def enroll_card_via_api(
     headers = {"Content-Type": "application/json"}
     encrypted_payload, headers = encrypt_payload_if_configured(payload, headers=headers)
     response = client.request("POST", "/consents", json_body=encrypted_payload, headers=headers, allow_retry=False)
-    data = response.json()
+    data = parse_json(response)
 
     consents = data.get("consents") or []
     consent = consents[0] if consents else {}
@@ -200,7 +211,7 @@ def start_authentication(
         headers=headers,
         allow_retry=False,
     )
-    return response.json()
+    return parse_json(response)
 
 
 def verify_authentication(
@@ -219,7 +230,7 @@ def verify_authentication(
         headers=headers,
         allow_retry=False,
     )
-    return response.json()
+    return parse_json(response)
 
 
 def build_enrollment_record(result: EnrollmentResult, card: CardDetails) -> Dict[str, Any]:
@@ -3,12 +3,15 @@
 from __future__ import annotations
 
 import os
+import secrets
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from uuid import uuid4
 
 import jwt
-from oauth1 import authenticationutils
+
+from .mc_client import load_signing_key
 
 
 @dataclass
@@ -20,6 +23,15 @@ def consent_ui_src() -> str:
     return os.getenv("MC_CONSENT_UI_SRC", "https://consents.mastercard.com")
 
 
+# Signed Consent UI JWTs keyed by callback origin and signing identity, reused until
+# _JWT_REFRESH_MARGIN seconds before they expire. Holds at most _JWT_CACHE_SIZE
+# entries; expired ones go first, then the oldest. Cached tokens carry no jti, since
+# the same token is sent on every frame load until it is refreshed.
+_JWT_CACHE: dict[tuple, tuple[str, int]] = {}
+_JWT_CACHE_LOCK = threading.Lock()
+_JWT_REFRESH_MARGIN = 60
+_JWT_CACHE_SIZE = 8
+
 
 def generate_consent_ui_jwt(callback_origin: str) -> str:
     consumer_key = os.getenv("MC_CONSUMER_KEY")
@@ -29,7 +41,17 @@ def generate_consent_ui_jwt(callback_origin: str) -> str:
     if not consumer_key or not keystore_path or not keystore_password:
         raise ValueError("Missing MC_CONSUMER_KEY/MC_KEYSTORE_PATH/MC_KEYSTORE_PASSWORD for Consent UI JWT")
 
-    signing_key = authenticationutils.load_signing_key(keystore_path, keystore_password)
+    try:
+        keystore_mtime = os.stat(keystore_path).st_mtime_ns
+    except OSError:
+        keystore_mtime = None
+    cache_key = (callback_origin, consumer_key, keystore_path, keystore_mtime)
+    with _JWT_CACHE_LOCK:
+        cached = _JWT_CACHE.get(cache_key)
+    if cached and time.time() < cached[1] - _JWT_REFRESH_MARGIN:
+        return cached[0]
+
+    signing_key = load_signing_key(keystore_path, keystore_password)
 
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=15)
@@ -38,7 +60,6 @@ def generate_consent_ui_jwt(callback_origin: str) -> str:
         "iat": int(now.timestamp()),
         "nbf": int(now.timestamp()),
         "exp": int(exp.timestamp()),
-        "jti": str(uuid4()),
         "appdata": {"callbackURL": callback_origin},
     }
 
@@ -48,9 +69,41 @@ def generate_consent_ui_jwt(callback_origin: str) -> str:
         algorithm="RS256",
         headers={"typ": "JWT", "alg": "RS256", "kid": consumer_key},
     )
+    _store_jwt(cache_key, token, payload["exp"])
     return token
 
 
+def _store_jwt(cache_key: tuple, token: str, exp: int) -> None:
+    now = time.time()
+    with _JWT_CACHE_LOCK:
+        for key, (_token, key_exp) in list(_JWT_CACHE.items()):
+            if now >= key_exp - _JWT_REFRESH_MARGIN:
+                _JWT_CACHE.pop(key, None)
+        _JWT_CACHE.pop(cache_key, None)
+        while len(_JWT_CACHE) >= _JWT_CACHE_SIZE:
+            _JWT_CACHE.pop(next(iter(_JWT_CACHE)), None)
+        _JWT_CACHE[cache_key] = (token, exp)
+
+
+def issue_ui_state(secret_key: str, ttl_minutes: int = 15) -> str:
+    """Short-lived HS256 token used as the hosted UI ``state``; verifiable without storage."""
+    now = datetime.now(timezone.utc)
+    payload = {
+        "nonce": secrets.token_urlsafe(12),
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(minutes=ttl_minutes)).timestamp()),
+    }
+    return jwt.encode(payload, secret_key, algorithm="HS256")
+
+
+def verify_ui_state(state: str, secret_key: str) -> bool:
+    try:
+        jwt.decode(state, secret_key, algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return False
+    return True
+
+
 def describe_consent_ui_jwt(token: str) -> dict:
     header = jwt.get_unverified_header(token)
     payload = jwt.decode(token, options={"verify_signature": False})
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from typing import Any, Dict, Tuple
 
 from client_encryption.api_encryption import ApiEncryption
@@ -33,6 +34,20 @@ def build_encryption_config(cert_path: str) -> FieldLevelEncryptionConfig:
     return FieldLevelEncryptionConfig(config)
 
 
+@lru_cache(maxsize=4)
+def _cached_encryption_config(cert_path: str, mtime_ns: int) -> FieldLevelEncryptionConfig:
+    return build_encryption_config(cert_path)
+
+
+def encryption_config(cert_path: str) -> FieldLevelEncryptionConfig:
+    """Encryption config for ``cert_path``, rebuilt only when the certificate file changes."""
+    try:
+        mtime_ns = os.stat(cert_path).st_mtime_ns
+    except OSError:
+        return build_encryption_config(cert_path)
+    return _cached_encryption_config(cert_path, mtime_ns)
+
+
 def encrypt_payload_if_configured(
     payload: Dict[str, Any],
     headers: Dict[str, str] | None = None,
@@ -42,6 +57,6 @@ def encrypt_payload_if_configured(
     if not cert_path:
         return payload, headers
 
-    conf = build_encryption_config(cert_path)
+    conf = encryption_config(cert_path)
     encrypted_payload = ApiEncryption.encrypt_field_level_payload(headers, conf, payload)
     return encrypted_payload, headers
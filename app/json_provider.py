@@ -0,0 +1,39 @@
+"""orjson-backed JSON provider for Flask responses and request parsing."""
+
+from __future__ import annotations
+
+import typing as t
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+# Datetimes and dataclasses are handed to Flask's default hook so jsonify output
+# matches the stdlib provider (RFC 822 dates, dataclasses.asdict).
+_BASE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    def _options(self, *, indent: bool = False, sort_keys: bool | None = None) -> int:
+        options = _BASE_OPTIONS
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj: t.Any, *, indent: bool = False, sort_keys: bool | None = None) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._options(indent=indent, sort_keys=sort_keys))
+
+    def dumps(self, obj: t.Any, **kwargs: t.Any) -> str:
+        indent = bool(kwargs.get("indent"))
+        return self.dumps_bytes(obj, indent=indent, sort_keys=kwargs.get("sort_keys")).decode("utf-8")
+
+    def loads(self, s: str | bytes, **kwargs: t.Any) -> t.Any:
+        return orjson.loads(s)
+
+    def response(self, *args: t.Any, **kwargs: t.Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = self.dumps_bytes(obj, indent=indent) + b"\n"
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -6,26 +6,41 @@ import json
 import logging
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, Mapping, Optional
 
+import orjson
 import requests
 from oauth1 import authenticationutils, signer as oauth_signer
 from requests import PreparedRequest, Response, Session
-from tenacity import retry, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential_jitter
+from requests.adapters import HTTPAdapter
+from requests.sessions import merge_setting
+from requests.structures import CaseInsensitiveDict
+from tenacity import Retrying, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential_jitter
 
 logger = logging.getLogger(__name__)
 
-SENSITIVE_HEADERS = {"authorization"}
-SENSITIVE_FIELDS = {"pan", "full_pan", "card_number", "cvc", "cvv"}
+SENSITIVE_HEADERS = frozenset({"authorization"})
+SENSITIVE_FIELDS = frozenset({"pan", "full_pan", "card_number", "cvc", "cvv"})
+_ERROR_DESCRIPTION_CHARS = 2000
 
 
-@dataclass
 class MastercardApiError(Exception):
-    status_code: int
-    reason_code: str | None
-    description: str | None
-    correlation_id: str | None
+    def __init__(
+        self,
+        status_code: int,
+        reason_code: str | None,
+        description: str | None,
+        correlation_id: str | None,
+    ) -> None:
+        # The raw fields become ``args`` so the error pickles; the message is only
+        # formatted when something actually renders it.
+        super().__init__(status_code, reason_code, description, correlation_id)
+        self.status_code = status_code
+        self.reason_code = reason_code
+        self.description = description
+        self.correlation_id = correlation_id
 
     def __str__(self) -> str:
         return (
@@ -41,6 +56,7 @@ class ClientConfig:
     max_retries: int = 3
     backoff_seconds: float = 0.5
     user_agent: str = "tn-demo-app/1.0"
+    pool_maxsize: int = 50
 
 
 def validate_env_and_keystore() -> None:
@@ -53,6 +69,16 @@ def validate_env_and_keystore() -> None:
         raise FileNotFoundError(f"Keystore not found: {keystore_path}")
 
 
+@lru_cache(maxsize=4)
+def _load_signing_key(keystore_path: str, keystore_password: str, mtime_ns: int):
+    return authenticationutils.load_signing_key(keystore_path, keystore_password)
+
+
+def load_signing_key(keystore_path: str, keystore_password: str):
+    """Load the PKCS12 signing key, reusing the parsed key until the keystore file changes."""
+    return _load_signing_key(keystore_path, keystore_password, os.stat(keystore_path).st_mtime_ns)
+
+
 class MastercardApiClient:
     def __init__(
         self,
@@ -67,21 +93,36 @@ class MastercardApiClient:
         self.consumer_key = consumer_key
         self.keystore_path = keystore_path
         self.keystore_password = keystore_password
-        self.session = session or requests.Session()
+        if session is None:
+            session = requests.Session()
+            # Default pools hold 10 connections; size for threaded servers so
+            # concurrent requests reuse warm TLS connections instead of re-handshaking.
+            adapter = HTTPAdapter(pool_connections=config.pool_maxsize, pool_maxsize=config.pool_maxsize)
+            session.mount("https://", adapter)
+        session.headers["User-Agent"] = config.user_agent
+        self.session = session
 
         if signer is None:
             self._validate_params()
-            signing_key = authenticationutils.load_signing_key(self.keystore_path, self.keystore_password)
+            signing_key = load_signing_key(self.keystore_path, self.keystore_password)
             signer = oauth_signer.OAuthSigner(self.consumer_key, signing_key)
         self.signer = signer
+        self._base_url = config.base_url.rstrip("/")
+        self._retrying = Retrying(
+            stop=stop_after_attempt(config.max_retries),
+            wait=wait_exponential_jitter(initial=config.backoff_seconds, max=5),
+            retry=(retry_if_exception_type(requests.RequestException) | retry_if_result(_is_server_error)),
+            reraise=True,
+        )
 
     @classmethod
-    def from_env(cls, base_url: str) -> "MastercardApiClient":
+    def from_env(cls, base_url: str, session: Session | None = None) -> "MastercardApiClient":
         return cls(
             config=ClientConfig(base_url=base_url),
             consumer_key=os.getenv("MC_CONSUMER_KEY", ""),
             keystore_path=os.getenv("MC_KEYSTORE_PATH", ""),
             keystore_password=os.getenv("MC_KEYSTORE_PASSWORD", ""),
+            session=session,
         )
 
     def _validate_params(self) -> None:
@@ -105,27 +146,21 @@ class MastercardApiClient:
         params: Dict[str, Any] | None,
         json_body: Dict[str, Any] | None,
     ) -> PreparedRequest:
-        req = requests.Request(method=method, url=url, headers=headers, params=params, json=json_body)
-        prepared = self.session.prepare_request(req)
-        signed_url = prepared.url or url
-        self.signer.sign_request(signed_url, prepared)
-        prepared.headers.setdefault("User-Agent", self.config.user_agent)
+        # Prepare directly rather than via Session.prepare_request: the OAuth signer
+        # supplies auth, and these APIs use no cookies, so only session headers merge.
+        prepared = PreparedRequest()
+        prepared.prepare(
+            method=method.upper(),
+            url=url,
+            headers=merge_setting(headers, self.session.headers, dict_class=CaseInsensitiveDict),
+            params=params,
+            json=json_body,
+        )
+        self.signer.sign_request(prepared.url, prepared)
         return prepared
 
     def _send_with_retry(self, prepared: PreparedRequest) -> Response:
-        @retry(
-            stop=stop_after_attempt(self.config.max_retries),
-            wait=wait_exponential_jitter(initial=self.config.backoff_seconds, max=5),
-            retry=(
-                retry_if_exception_type(requests.RequestException)
-                | retry_if_result(lambda resp: resp is not None and resp.status_code >= 500)
-            ),
-            reraise=True,
-        )
-        def _send() -> Response:
-            return self.session.send(prepared, timeout=self.config.timeout_seconds)
-
-        return _send()
+        return self._retrying(self.session.send, prepared, timeout=self.config.timeout_seconds)
 
     def request(
         self,
@@ -137,7 +172,7 @@ class MastercardApiClient:
         json_body: Dict[str, Any] | None = None,
         allow_retry: bool | None = None,
     ) -> Response:
-        url = f"{self.config.base_url.rstrip('/')}/{path.lstrip('/')}"
+        url = f"{self._base_url}/{path.lstrip('/')}"
         prepared = self._prepare_request(method, url, headers, params, json_body)
         self._log_request(prepared)
 
@@ -154,16 +189,17 @@ class MastercardApiClient:
         return response
 
     def _log_request(self, prepared: PreparedRequest) -> None:
-        headers = _redact_headers(dict(prepared.headers))
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+        headers = _redact_headers(prepared.headers)
         logger.debug("MC request %s %s headers=%s", prepared.method, prepared.url, headers)
 
     def _build_error(self, response: Response) -> MastercardApiError:
         reason_code = None
         description = None
         correlation_id = _correlation_id(response)
-        raw_text = None
         try:
-            payload = response.json()
+            payload = parse_json(response)
             reason_code = payload.get("ReasonCode") or payload.get("reasonCode")
             description = payload.get("Description") or payload.get("description")
             if description is None and payload is not None:
@@ -171,13 +207,21 @@ class MastercardApiClient:
         except (ValueError, json.JSONDecodeError):
             payload = None
         if description is None:
+            # Decode only the bytes that can end up in the description; response.text
+            # would decode (and possibly charset-sniff) the whole body first. The limit
+            # is 2000 characters: 4 bytes per character covers every encoding, so a
+            # character split at the byte cut never reaches the sliced text.
+            raw_bytes = (response.content or b"")[: _ERROR_DESCRIPTION_CHARS * 4]
             try:
-                raw_text = response.text
-            except Exception:
-                raw_text = None
+                raw_text = raw_bytes.decode(response.encoding or "utf-8", errors="replace")
+            except LookupError:
+                raw_text = raw_bytes.decode("utf-8", errors="replace")
+            raw_text = raw_text[:_ERROR_DESCRIPTION_CHARS]
             if raw_text:
-                description = raw_text[:2000]
-        logger.warning("MC error status=%s correlation_id=%s payload=%s", response.status_code, correlation_id, _redact_payload(payload))
+                description = raw_text
+        logger.warning("MC error status=%s correlation_id=%s", response.status_code, correlation_id)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("MC error payload=%s", _redact_payload(payload))
         return MastercardApiError(
             status_code=response.status_code,
             reason_code=reason_code,
@@ -186,23 +230,52 @@ class MastercardApiClient:
         )
 
 
+def parse_json(response: Response) -> Any:
+    """Decode a JSON response body with orjson.
+
+    Bodies orjson rejects (e.g. non-UTF-8 encodings) go through ``response.json()``,
+    which raises ValueError if the body is not JSON at all.
+    """
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return response.json()
+
+
+def _is_server_error(response: Response | None) -> bool:
+    return response is not None and response.status_code >= 500
+
+
 def _correlation_id(response: Response) -> str | None:
     return response.headers.get("Correlation-Id") or response.headers.get("X-Correlation-ID")
 
 
-def _redact_headers(headers: Dict[str, str]) -> Dict[str, str]:
-    redacted = {}
-    for key, value in headers.items():
-        if key.lower() in SENSITIVE_HEADERS:
-            redacted[key] = "[redacted]"
-        else:
-            redacted[key] = value
-    return redacted
+def _redact_headers(headers: Mapping[str, str]) -> Dict[str, str]:
+    return {key: "[redacted]" if key.lower() in SENSITIVE_HEADERS else value for key, value in headers.items()}
 
 
 def _redact_payload(payload: Any) -> Any:
-    if isinstance(payload, dict):
-        return {k: ("[redacted]" if k in SENSITIVE_FIELDS else _redact_payload(v)) for k, v in payload.items()}
-    if isinstance(payload, list):
-        return [_redact_payload(item) for item in payload]
-    return payload
+    """Copy of ``payload`` with sensitive fields masked at any depth.
+
+    Walks with an explicit stack of (source, copy) containers instead of recursing,
+    filling each copy in place so key order is preserved.
+    """
+    if not isinstance(payload, (dict, list)):
+        return payload
+    root: Any = {} if isinstance(payload, dict) else [None] * len(payload)
+    stack = [(payload, root)]
+    while stack:
+        source, target = stack.pop()
+        items = source.items() if isinstance(source, dict) else enumerate(source)
+        for key, value in items:
+            if key in SENSITIVE_FIELDS:
+                target[key] = "[redacted]"
+            elif isinstance(value, dict):
+                target[key] = {}
+                stack.append((value, target[key]))
+            elif isinstance(value, list):
+                target[key] = [None] * len(value)
+                stack.append((value, target[key]))
+            else:
+                target[key] = value
+    return root
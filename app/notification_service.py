@@ -2,17 +2,21 @@
 
 from __future__ import annotations
 
+import hashlib
+import re
 import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache, partial
 from uuid import uuid4
-import json
 
-from .mc_client import MastercardApiClient
+import orjson
 
-SENSITIVE_FIELDS = {"pan", "full_pan", "card_number", "cvc", "cvv"}
-MERCHANT_KEYS = ("merchantName", "merchant_name", "merchant", "merchant_name", "merchantNameLocation")
+from .mc_client import MastercardApiClient, parse_json
+
+SENSITIVE_FIELDS = frozenset({"pan", "full_pan", "card_number", "cvc", "cvv"})
+MERCHANT_KEYS = ("merchantName", "merchant_name", "merchant", "merchantNameLocation")
 EVENT_TIME_KEYS = (
     "eventTime",
     "event_time",
@@ -29,6 +33,66 @@ SYSTEM_TRACE_KEYS = ("systemTraceAuditNumber", "system_trace_audit_number", "sta
 TRANS_UID_KEYS = ("transUid", "trans_uid")
 SEQUENCE_KEYS = ("notificationSequenceId", "notification_sequence_id")
 MESSAGE_TYPE_KEYS = ("messageType", "message_type")
+CARD_REFERENCE_KEYS = ("cardReference", "card_reference")
+AMOUNT_KEYS = (
+    "cardholderAmount",
+    "cardHolderAmount",
+    "cardholder_amount",
+    "transactionAmount",
+    "transaction_amount",
+    "amount",
+    "merchantAmount",
+    "merchant_amount",
+)
+CURRENCY_KEYS = (
+    "cardholderCurrency",
+    "cardHolderCurrency",
+    "cardholder_currency",
+    "transactionCurrency",
+    "transaction_currency",
+    "currency",
+    "merchantCurrency",
+    "merchant_currency",
+    "currencyCode",
+    "currency_code",
+)
+ENCRYPTED_PAYLOAD_KEYS = ("encryptedValue", "jweEncryptedData")
+# Record fields filled from plain key lookups in the raw payload.
+VALUE_FIELD_KEYS = {
+    "merchant": MERCHANT_KEYS,
+    "event_time": EVENT_TIME_KEYS,
+    "reference_number": REFERENCE_NUMBER_KEYS,
+    "system_trace_audit_number": SYSTEM_TRACE_KEYS,
+    "trans_uid": TRANS_UID_KEYS,
+    "notification_sequence_id": SEQUENCE_KEYS,
+    "message_type": MESSAGE_TYPE_KEYS,
+}
+# The *_KEYS tuples give lookup priority; these sets let a node that holds none of
+# the keys be skipped with one C-level isdisjoint() check.
+_CARD_REFERENCE_KEY_SET = frozenset(CARD_REFERENCE_KEYS)
+_AMOUNT_KEY_SET = frozenset(AMOUNT_KEYS)
+_CURRENCY_KEY_SET = frozenset(CURRENCY_KEYS)
+_ENCRYPTED_PAYLOAD_KEY_SET = frozenset(ENCRYPTED_PAYLOAD_KEYS)
+_VALUE_FIELD_KEY_SETS = {name: (keys, frozenset(keys)) for name, keys in VALUE_FIELD_KEYS.items()}
+# Every record field extracted from the raw payload, in record order.
+PAYLOAD_FIELDS = (
+    "card_reference",
+    "merchant",
+    "amount",
+    "currency",
+    "event_time",
+    "reference_number",
+    "system_trace_audit_number",
+    "trans_uid",
+    "notification_sequence_id",
+    "message_type",
+    "encrypted_payload",
+)
+MATCH_KEY_FIELD = "_match_key"
+EVENT_TS_FIELD = "_ts_event"
+# Bump when canonicalize_notifications starts producing different stored records;
+# files saved at an older version are canonicalized once on next read.
+NOTIFICATION_SCHEMA_VERSION = 1
 
 
 @dataclass
@@ -41,30 +105,79 @@ class PollResult:
 
 
 def _strip_sensitive(payload: object) -> object:
-    if isinstance(payload, dict):
-        cleaned = {}
-        for key, value in payload.items():
-            if key in SENSITIVE_FIELDS:
-                continue
-            cleaned[key] = _strip_sensitive(value)
-        return cleaned
-    if isinstance(payload, list):
-        return [_strip_sensitive(item) for item in payload]
-    return payload
+    """``payload`` without sensitive fields at any depth.
+
+    Payloads with nothing to strip (the usual case) are returned as-is, not
+    copied. Otherwise walks with an explicit stack of (source, copy) containers,
+    like ``mc_client._redact_payload``, filling each copy in place so order is kept.
+    """
+    if not _has_sensitive_fields(payload):
+        return payload
+    root: object = {} if isinstance(payload, dict) else [None] * len(payload)
+    stack = [(payload, root)]
+    while stack:
+        source, target = stack.pop()
+        if isinstance(source, dict):
+            items = ((key, value) for key, value in source.items() if key not in SENSITIVE_FIELDS)
+        else:
+            items = enumerate(source)
+        for key, value in items:
+            if isinstance(value, dict):
+                target[key] = {}
+                stack.append((value, target[key]))
+            elif isinstance(value, list):
+                target[key] = [None] * len(value)
+                stack.append((value, target[key]))
+            else:
+                target[key] = value
+    return root
+
+
+def _has_sensitive_fields(payload: object) -> bool:
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if not SENSITIVE_FIELDS.isdisjoint(node):
+                return True
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return False
 
 
-def _maybe_parse_json(value: object) -> object | None:
-    if not isinstance(value, str):
+def _maybe_parse_json(value: object, *, shared: bool = False) -> object | None:
+    """Parse ``value`` if it is a string holding a JSON object or array.
+
+    With ``shared=True`` the result comes from a cache and may be handed to other
+    callers, so it must only be read, never mutated.
+    """
+    if not isinstance(value, str) or not value:
         return None
-    text = value.strip()
-    if not text or (not text.startswith("{") and not text.startswith("[")):
+    # Most strings are neither padded nor JSON: decide on the first character and
+    # only copy the string via strip() when it is padded.
+    text = value
+    if text[0].isspace() or text[-1].isspace():
+        text = text.strip()
+        if not text:
+            return None
+    if text[0] != "{" and text[0] != "[":
         return None
+    return _parse_json_shared(text) if shared else _parse_json(text)
+
+
+def _parse_json(text: str) -> object | None:
     try:
-        return json.loads(text)
-    except (TypeError, json.JSONDecodeError):
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
         return None
 
 
+# Stringified sub-objects (the ``payload`` field in particular) are searched again
+# each time a notification is polled, built or canonicalized.
+_parse_json_shared = lru_cache(maxsize=2048)(_parse_json)
+
+
 def _extract_notifications(payload: object) -> list:
     if isinstance(payload, list):
         return payload
@@ -87,145 +200,212 @@ def _extract_notifications(payload: object) -> list:
     return []
 
 
+def _iter_dicts(payload: object):
+    """Yield every dict under ``payload`` in the order the extractors search them.
+
+    Depth-first and pre-order: a dict comes before its values, and a string holding
+    JSON is parsed (once) and searched in place of the string.
+    """
+    # Payloads are decoded JSON, so exact type checks suffice and are cheaper than
+    # isinstance() on every node.
+    stack = [payload] if type(payload) in (dict, list) else []
+    while stack:
+        node = stack.pop()
+        node_type = type(node)
+        if node_type is str:
+            node = _maybe_parse_json(node, shared=True)
+            node_type = type(node)
+        if node_type is dict:
+            yield node
+            stack.extend(reversed(node.values()))
+        elif node_type is list:
+            stack.extend(reversed(node))
+
+
+def _card_reference_at(node: dict) -> str | None:
+    if _CARD_REFERENCE_KEY_SET.isdisjoint(node):
+        return None
+    for key in CARD_REFERENCE_KEYS:
+        value = node.get(key)
+        if isinstance(value, str) and value:
+            return value
+    return None
+
+
+def _value_at(node: dict, keys: tuple[str, ...], key_set: frozenset[str]) -> object | None:
+    if key_set.isdisjoint(node):
+        return None
+    for key in keys:
+        value = node.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def _amount_currency_at(node: dict) -> tuple[object | None, object | None] | None:
+    if _AMOUNT_KEY_SET.isdisjoint(node):
+        return None
+    for key in AMOUNT_KEYS:
+        value = node.get(key)
+        if isinstance(value, dict):
+            amount = value.get("amount") or value.get("value") or value.get("amountValue")
+            currency = value.get("currency") or value.get("currencyCode")
+            if amount not in (None, "") or currency not in (None, ""):
+                return amount, currency
+        if value not in (None, "") and not isinstance(value, (dict, list)):
+            return value, _find_value(node, CURRENCY_KEYS, _CURRENCY_KEY_SET)
+    return None
+
+
+def _is_encrypted_at(node: dict) -> bool:
+    return not _ENCRYPTED_PAYLOAD_KEY_SET.isdisjoint(node)
+
+
 def _extract_card_reference(payload: object) -> str | None:
-    if isinstance(payload, dict):
-        for key in ("cardReference", "card_reference"):
-            value = payload.get(key)
-            if isinstance(value, str) and value:
-                return value
-        for value in payload.values():
-            parsed = _maybe_parse_json(value)
-            if parsed is not None:
-                found = _extract_card_reference(parsed)
-                if found:
-                    return found
-            found = _extract_card_reference(value)
-            if found:
-                return found
-    elif isinstance(payload, list):
-        for item in payload:
-            parsed = _maybe_parse_json(item)
-            if parsed is not None:
-                found = _extract_card_reference(parsed)
-                if found:
-                    return found
-            found = _extract_card_reference(item)
-            if found:
-                return found
+    for node in _iter_dicts(payload):
+        found = _card_reference_at(node)
+        if found:
+            return found
     return None
 
 
 def _extract_value(payload: object, keys: tuple[str, ...]) -> object | None:
-    if isinstance(payload, dict):
-        for key in keys:
-            if key in payload and payload[key] not in (None, ""):
-                return payload[key]
-        for value in payload.values():
-            parsed = _maybe_parse_json(value)
-            if parsed is not None:
-                found = _extract_value(parsed, keys)
-                if found not in (None, ""):
-                    return found
-            found = _extract_value(value, keys)
-            if found not in (None, ""):
-                return found
-    elif isinstance(payload, list):
-        for item in payload:
-            parsed = _maybe_parse_json(item)
-            if parsed is not None:
-                found = _extract_value(parsed, keys)
-                if found not in (None, ""):
-                    return found
-            found = _extract_value(item, keys)
-            if found not in (None, ""):
-                return found
+    return _find_value(payload, keys, frozenset(keys))
+
+
+def _find_value(payload: object, keys: tuple[str, ...], key_set: frozenset[str]) -> object | None:
+    for node in _iter_dicts(payload):
+        found = _value_at(node, keys, key_set)
+        if found is not None:
+            return found
     return None
 
 
 def _extract_amount_currency(payload: object) -> tuple[object | None, object | None]:
-    amount_keys = (
-        "cardholderAmount",
-        "cardHolderAmount",
-        "cardholder_amount",
-        "transactionAmount",
-        "transaction_amount",
-        "amount",
-        "merchantAmount",
-        "merchant_amount",
-    )
-    currency_keys = (
-        "cardholderCurrency",
-        "cardHolderCurrency",
-        "cardholder_currency",
-        "transactionCurrency",
-        "transaction_currency",
-        "currency",
-        "merchantCurrency",
-        "merchant_currency",
-        "currencyCode",
-        "currency_code",
-    )
-    if isinstance(payload, dict):
-        for key in amount_keys:
-            value = payload.get(key)
-            if isinstance(value, dict):
-                amount = value.get("amount") or value.get("value") or value.get("amountValue")
-                currency = value.get("currency") or value.get("currencyCode")
-                if amount not in (None, "") or currency not in (None, ""):
-                    return amount, currency
-            if value not in (None, "") and not isinstance(value, (dict, list)):
-                amount = value
-                currency = _extract_value(payload, currency_keys)
-                return amount, currency
-        for value in payload.values():
-            parsed = _maybe_parse_json(value)
-            if parsed is not None:
-                amount, currency = _extract_amount_currency(parsed)
-                if amount not in (None, "") or currency not in (None, ""):
-                    return amount, currency
-            amount, currency = _extract_amount_currency(value)
-            if amount not in (None, "") or currency not in (None, ""):
-                return amount, currency
-    elif isinstance(payload, list):
-        for item in payload:
-            parsed = _maybe_parse_json(item)
-            if parsed is not None:
-                amount, currency = _extract_amount_currency(parsed)
-                if amount not in (None, "") or currency not in (None, ""):
-                    return amount, currency
-            amount, currency = _extract_amount_currency(item)
-            if amount not in (None, "") or currency not in (None, ""):
-                return amount, currency
+    for node in _iter_dicts(payload):
+        found = _amount_currency_at(node)
+        if found:
+            return found
     return None, None
 
 
 def _has_encrypted_payload(payload: object) -> bool:
-    if isinstance(payload, dict):
-        if "encryptedValue" in payload or "jweEncryptedData" in payload:
-            return True
-        for value in payload.values():
-            parsed = _maybe_parse_json(value)
-            if parsed is not None and _has_encrypted_payload(parsed):
-                return True
-            if _has_encrypted_payload(value):
-                return True
-    elif isinstance(payload, list):
-        for item in payload:
-            parsed = _maybe_parse_json(item)
-            if parsed is not None and _has_encrypted_payload(parsed):
-                return True
-            if _has_encrypted_payload(item):
-                return True
-    return False
+    return any(_is_encrypted_at(node) for node in _iter_dicts(payload))
+
+
+# Per field family: the record field it fills, and the node-level check. Payload
+# keys map to a bitmask of the families they can satisfy, so each node's keys are
+# looked up once and only the families with a key present are checked.
+_FIELD_FAMILIES = (
+    ("card_reference", CARD_REFERENCE_KEYS, _card_reference_at),
+    *(
+        (name, keys, partial(_value_at, keys=keys, key_set=key_set))
+        for name, (keys, key_set) in _VALUE_FIELD_KEY_SETS.items()
+    ),
+    ("amount", AMOUNT_KEYS, _amount_currency_at),
+    ("encrypted_payload", ENCRYPTED_PAYLOAD_KEYS, lambda node: _is_encrypted_at(node) or None),
+)
+_FAMILY_BITS = {name: 1 << bit for bit, (name, _keys, _check) in enumerate(_FIELD_FAMILIES)}
+_FAMILY_BITS["currency"] = _FAMILY_BITS["amount"]
+_FAMILY_CHECKS = tuple((name, _FAMILY_BITS[name], check) for name, _keys, check in _FIELD_FAMILIES)
+
+
+def _key_family_bits() -> dict[str, int]:
+    bits: dict[str, int] = {}
+    for name, keys, _check in _FIELD_FAMILIES:
+        for key in keys:
+            bits[key] = bits.get(key, 0) | _FAMILY_BITS[name]
+    return bits
+
+
+_KEY_FAMILY_BITS = _key_family_bits()
+
+
+def _extract_payload_fields(payload: object, wanted: tuple[str, ...] = PAYLOAD_FIELDS) -> dict:
+    """Search ``payload`` once for every record field in ``wanted``.
+
+    Each field gets the value its single-field extractor would return; the walk
+    stops as soon as all of them are found.
+    """
+    fields: dict = dict.fromkeys(wanted)
+    if "encrypted_payload" in fields:
+        fields["encrypted_payload"] = False
+    pending = 0
+    for name in wanted:
+        pending |= _FAMILY_BITS[name]
+
+    family_bits = _KEY_FAMILY_BITS
+    for node in _iter_dicts(payload):
+        present = 0
+        for key in node:
+            present |= family_bits.get(key, 0)
+        hits = present & pending
+        if not hits:
+            continue
+        for name, bit, check in _FAMILY_CHECKS:
+            if not hits & bit:
+                continue
+            found = check(node)
+            if found is None:
+                continue
+            if name == "amount":
+                fields["amount"], fields["currency"] = found
+            else:
+                fields[name] = found
+            pending &= ~bit
+        if not pending:
+            break
+    return fields
+
+
+_AMOUNT_RE = re.compile(r"(-?)([0-9]+)(?:\.([0-9]+))?")
+_DECIMAL_PRECISION = 28
 
 
 def _normalize_amount(value: object) -> str | None:
+    """Canonical amount text, identical to ``str(Decimal(value).normalize())``.
+
+    Plain decimal strings are normalized with string operations; anything else
+    (exponents, whitespace, values needing rounding or scientific notation) goes
+    through Decimal so stored fingerprints keep their format.
+    """
     if value in (None, ""):
         return None
+    return _normalize_amount_text(str(value))
+
+
+# Amounts and event times repeat heavily across records (the same test amounts,
+# timestamps shared by a notification and its transaction), so the string-level
+# parsers are memoized.
+@lru_cache(maxsize=4096)
+def _normalize_amount_text(text: str) -> str:
+    match = _AMOUNT_RE.fullmatch(text)
+    if match:
+        sign, whole, fraction = match.groups()
+        whole = whole.lstrip("0")
+        fraction = (fraction or "").rstrip("0")
+        if fraction:
+            significant = (whole + fraction).lstrip("0")
+            leading_zeros = len(fraction) - len(fraction.lstrip("0"))
+            if len(significant) <= _DECIMAL_PRECISION and (whole or leading_zeros < 6):
+                return f"{sign}{whole or '0'}.{fraction}"
+        elif not whole:
+            return sign + "0"
+        elif len(whole) <= _DECIMAL_PRECISION:
+            coefficient = whole.rstrip("0")
+            if len(coefficient) == len(whole):
+                return sign + whole
+            # Trailing zeros move into a positive exponent, which Decimal prints
+            # in scientific notation: "1500" -> "1.5E+3".
+            mantissa = coefficient[0] + ("." + coefficient[1:] if len(coefficient) > 1 else "")
+            return f"{sign}{mantissa}E+{len(whole) - 1}"
     try:
-        return str(Decimal(str(value)).normalize())
+        return str(Decimal(text).normalize())
     except (InvalidOperation, ValueError):
-        return str(value).strip()
+        return text.strip()
+
+
+_EMPTY = (None, "")
 
 
 def _normalize_text(value: object) -> str | None:
@@ -247,36 +427,112 @@ def notification_fingerprint(record: dict) -> str | None:
     if card_reference in (None, ""):
         return None
 
+    event_time = record.get("event_time") or record.get("received_at") or record.get("created_at")
     reference_number = record.get("reference_number")
     system_trace = record.get("system_trace_audit_number")
     amount = record.get("amount")
     currency = record.get("currency")
     merchant = record.get("merchant")
-    event_time = record.get("event_time") or record.get("received_at") or record.get("created_at")
     message_type = record.get("message_type")
+    if (
+        event_time in _EMPTY
+        and reference_number in _EMPTY
+        and system_trace in _EMPTY
+        and amount in _EMPTY
+        and currency in _EMPTY
+        and merchant in _EMPTY
+        and message_type in _EMPTY
+    ):
+        return None
 
-    normalized_amount = _normalize_amount(amount)
-    normalized_currency = _normalize_text(currency)
-    normalized_merchant = _normalize_text(merchant)
-    normalized_message_type = _normalize_text(message_type)
-    normalized_reference = _normalize_text(reference_number)
-    normalized_system_trace = _normalize_text(system_trace)
-
+    # Same normalization as _normalize_text/_normalize_amount, inlined: this runs
+    # for every notification without a trans_uid or sequence id.
     parts = [
         str(card_reference).strip(),
-        normalized_reference or "",
-        normalized_system_trace or "",
-        normalized_amount or "",
-        normalized_currency or "",
-        normalized_merchant or "",
-        str(event_time).strip() if event_time not in (None, "") else "",
-        normalized_message_type or "",
+        "" if reference_number in _EMPTY else str(reference_number).strip().upper(),
+        "" if system_trace in _EMPTY else str(system_trace).strip().upper(),
+        "" if amount in _EMPTY else _normalize_amount_text(str(amount)),
+        "" if currency in _EMPTY else str(currency).strip().upper(),
+        "" if merchant in _EMPTY else str(merchant).strip().upper(),
+        "" if event_time in _EMPTY else str(event_time).strip(),
+        "" if message_type in _EMPTY else str(message_type).strip().upper(),
     ]
+    # Values that were only whitespace normalize to "".
     if not any(parts[1:]):
         return None
     return "combo:" + "|".join(parts)
 
 
+_fromiso = datetime.fromisoformat
+_strptime = datetime.strptime
+_STRPTIME_FORMATS = ("%Y-%m-%dT%H:%M:%S%z", "%Y-%m-%dT%H:%M:%S.%f%z")
+
+
+def parse_timestamp(value: object) -> float:
+    if value in (None, ""):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return _parse_timestamp_text(value)
+    return 0.0
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp_text(value: str) -> float:
+    text = value.strip()
+    if not text:
+        return 0.0
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    if len(text) >= 5 and text[-5] in "+-" and text[-2:].isdigit() and text[-4:-2].isdigit():
+        if text[-3] != ":":
+            text = text[:-2] + ":" + text[-2:]
+    try:
+        return _fromiso(text).timestamp()
+    except ValueError:
+        pass
+    for fmt in _STRPTIME_FORMATS:
+        try:
+            return _strptime(text, fmt).timestamp()
+        except ValueError:
+            continue
+    return 0.0
+
+
+def notification_match_key(record: dict) -> str | None:
+    """Key used to pair a notification with a UI-posted transaction."""
+    card_ref = record.get("card_reference") or record.get("consent_id")
+    amount = _normalize_amount(record.get("amount"))
+    currency = _normalize_text(record.get("currency"))
+    merchant = _normalize_text(record.get("merchant"))
+    if card_ref and amount and currency and merchant:
+        return "|".join((str(card_ref).strip(), amount, currency, merchant))
+    return None
+
+
+def ensure_match_key(record: dict) -> str | None:
+    if MATCH_KEY_FIELD not in record:
+        record[MATCH_KEY_FIELD] = notification_match_key(record)
+    return record[MATCH_KEY_FIELD]
+
+
+def ensure_event_timestamp(record: dict) -> bool:
+    if EVENT_TS_FIELD in record:
+        return False
+    record[EVENT_TS_FIELD] = parse_timestamp(
+        record.get("event_time") or record.get("received_at") or record.get("created_at")
+    )
+    return True
+
+
+def refresh_derived_fields(record: dict) -> None:
+    """Recompute the cached match key and event timestamp after fields change."""
+    record[MATCH_KEY_FIELD] = notification_match_key(record)
+    record.pop(EVENT_TS_FIELD, None)
+    ensure_event_timestamp(record)
+
+
 def ensure_notification_fingerprint(record: dict) -> str | None:
     fingerprint = record.get("fingerprint")
     if fingerprint not in (None, ""):
@@ -292,114 +548,99 @@ def enrich_notification_record(record: dict) -> bool:
     if payload is None:
         return False
 
-    parsed = _maybe_parse_json(payload)
-    payload_obj = parsed if parsed is not None else payload
     changed = False
+    # Records enriched before already carry every field; only parse and walk the
+    # payload for the ones still missing.
+    wanted = tuple(
+        name
+        for name in PAYLOAD_FIELDS
+        if (name not in record if name == "encrypted_payload" else not record.get(name))
+    )
+    if wanted:
+        parsed = _maybe_parse_json(payload, shared=True)
+        payload_obj = parsed if parsed is not None else payload
+        fields = _extract_payload_fields(payload_obj, wanted)
+        for name in wanted:
+            value = fields[name]
+            if name == "encrypted_payload" or value not in (None, ""):
+                record[name] = value
+                changed = True
 
-    if not record.get("card_reference"):
-        card_reference = _extract_card_reference(payload_obj)
-        if card_reference:
-            record["card_reference"] = card_reference
-            changed = True
-
-    if not record.get("merchant"):
-        merchant = _extract_value(payload_obj, MERCHANT_KEYS)
-        if merchant not in (None, ""):
-            record["merchant"] = merchant
+    if not record.get("fingerprint"):
+        if ensure_notification_fingerprint(record):
             changed = True
 
-    amount, currency = None, None
-    if not record.get("amount") or not record.get("currency"):
-        amount, currency = _extract_amount_currency(payload_obj)
-
-    if not record.get("amount") and amount not in (None, ""):
-        record["amount"] = amount
-        changed = True
-
-    if not record.get("currency") and currency not in (None, ""):
-        record["currency"] = currency
-        changed = True
-
-    if not record.get("event_time"):
-        event_time = _extract_value(payload_obj, EVENT_TIME_KEYS)
-        if event_time not in (None, ""):
-            record["event_time"] = event_time
-            changed = True
+    return changed
 
-    if not record.get("reference_number"):
-        reference_number = _extract_value(payload_obj, REFERENCE_NUMBER_KEYS)
-        if reference_number not in (None, ""):
-            record["reference_number"] = reference_number
-            changed = True
 
-    if not record.get("system_trace_audit_number"):
-        system_trace_audit_number = _extract_value(payload_obj, SYSTEM_TRACE_KEYS)
-        if system_trace_audit_number not in (None, ""):
-            record["system_trace_audit_number"] = system_trace_audit_number
+def dedupe_notifications(records: list) -> tuple[list, bool]:
+    deduped: list = []
+    seen: set[str] = set()
+    changed = False
+    for record in records:
+        key = record.get("fingerprint") or notification_fingerprint(record) or record.get("id")
+        if not key:
+            deduped.append(record)
+            continue
+        key_str = str(key)
+        if key_str in seen:
             changed = True
+            continue
+        seen.add(key_str)
+        deduped.append(record)
+    return deduped, changed
 
-    if not record.get("trans_uid"):
-        trans_uid = _extract_value(payload_obj, TRANS_UID_KEYS)
-        if trans_uid not in (None, ""):
-            record["trans_uid"] = trans_uid
-            changed = True
 
-    if not record.get("notification_sequence_id"):
-        sequence_id = _extract_value(payload_obj, SEQUENCE_KEYS)
-        if sequence_id not in (None, ""):
-            record["notification_sequence_id"] = sequence_id
+def canonicalize_notifications(records: list) -> tuple[list, bool]:
+    """Enrich, fingerprint, and dedupe stored records so readers can use them as-is."""
+    changed = False
+    for record in records:
+        if enrich_notification_record(record) or MATCH_KEY_FIELD not in record or EVENT_TS_FIELD not in record:
+            refresh_derived_fields(record)
             changed = True
+        if not record.get("fingerprint"):
+            if ensure_notification_fingerprint(record):
+                changed = True
+    records, deduped = dedupe_notifications(records)
+    return records, changed or deduped
 
-    if not record.get("message_type"):
-        message_type = _extract_value(payload_obj, MESSAGE_TYPE_KEYS)
-        if message_type not in (None, ""):
-            record["message_type"] = message_type
-            changed = True
 
-    if "encrypted_payload" not in record:
-        record["encrypted_payload"] = _has_encrypted_payload(payload_obj)
-        changed = True
+def notification_batch_hash(notifications: list) -> int:
+    """Order-independent hash of a raw poll batch.
 
-    if not record.get("fingerprint"):
-        if ensure_notification_fingerprint(record):
-            changed = True
+    Per-item digests are combined by addition mod 2**64 rather than XOR so a
+    repeated item does not cancel itself out.
+    """
+    total = 0
+    for item in notifications:
+        digest = hashlib.blake2b(orjson.dumps(item, option=orjson.OPT_SORT_KEYS), digest_size=8).digest()
+        total += int.from_bytes(digest, "big")
+    return total & 0xFFFFFFFFFFFFFFFF
 
-    return changed
 
+def build_notification_record(notification: dict, now_iso: str | None = None) -> dict:
+    """Build a stored record from a raw notification.
 
-def build_notification_record(notification: dict) -> dict:
-    card_reference = _extract_card_reference(notification)
-    merchant = _extract_value(notification, MERCHANT_KEYS)
-    amount, currency = _extract_amount_currency(notification)
-    event_time = _extract_value(notification, EVENT_TIME_KEYS)
-    reference_number = _extract_value(notification, REFERENCE_NUMBER_KEYS)
-    system_trace_audit_number = _extract_value(notification, SYSTEM_TRACE_KEYS)
-    trans_uid = _extract_value(notification, TRANS_UID_KEYS)
-    notification_sequence_id = _extract_value(notification, SEQUENCE_KEYS)
-    message_type = _extract_value(notification, MESSAGE_TYPE_KEYS)
-    payload = _strip_sensitive(notification)
-    encrypted_payload = _has_encrypted_payload(notification)
+    Pass ``now_iso`` to stamp a whole batch with one ``received_at`` value.
+    """
     record = {
         "id": notification.get("id") or notification.get("notificationId") or str(uuid4()),
-        "card_reference": card_reference,
-        "merchant": merchant,
-        "amount": amount,
-        "currency": currency,
-        "event_time": event_time,
-        "reference_number": reference_number,
-        "system_trace_audit_number": system_trace_audit_number,
-        "trans_uid": trans_uid,
-        "notification_sequence_id": notification_sequence_id,
-        "message_type": message_type,
-        "encrypted_payload": encrypted_payload,
+        **_extract_payload_fields(notification),
         "status": "UNDELIVERED",
-        "received_at": datetime.now(timezone.utc).isoformat(),
-        "payload": payload,
+        "received_at": now_iso or datetime.now(timezone.utc).isoformat(),
+        "payload": _strip_sensitive(notification),
     }
     ensure_notification_fingerprint(record)
+    refresh_derived_fields(record)
     return record
 
 
+def build_notification_records(notifications: list) -> list:
+    """Build stored records for one polled batch, stamped with a single ``received_at``."""
+    now_iso = datetime.now(timezone.utc).isoformat()
+    return [build_notification_record(notification, now_iso) for notification in notifications]
+
+
 def fetch_undelivered_notifications(client: MastercardApiClient, after: int | None = None) -> list:
     params = {"after": after} if after is not None else None
     response = client.request(
@@ -408,13 +649,28 @@ def fetch_undelivered_notifications(client: MastercardApiClient, after: int | No
         params=params,
         headers={"Content-Type": "application/json"},
     )
+    # An empty page (e.g. 204) would otherwise fail both orjson and the
+    # response.json() fallback before landing on the same empty result.
+    if not response.content:
+        return []
     try:
-        payload = response.json()
+        payload = parse_json(response)
     except ValueError:
         payload = {}
     return _extract_notifications(payload)
 
 
+def _notification_identity(notification: object) -> object:
+    if isinstance(notification, dict):
+        notification_id = notification.get("id") or notification.get("notificationId")
+        if notification_id not in (None, ""):
+            return ("id", str(notification_id))
+    try:
+        return orjson.dumps(notification, option=orjson.OPT_SORT_KEYS)
+    except orjson.JSONEncodeError:
+        return ("object", id(notification))
+
+
 def poll_undelivered_notifications(
     client: MastercardApiClient,
     *,
@@ -422,13 +678,24 @@ def poll_undelivered_notifications(
     after: int | None = None,
     max_attempts: int = 3,
     backoff_seconds: float = 1.0,
+    backoff_factor: float = 2.0,
     sleep_fn=time.sleep,
+    clock=time.monotonic,
 ) -> PollResult:
     collected: list = []
+    seen: set = set()
     matched: dict | None = None
 
     for attempt in range(1, max_attempts + 1):
-        notifications = fetch_undelivered_notifications(client, after=after)
+        started = clock()
+        # Undelivered notifications stay in the queue, so later attempts return the
+        # earlier ones again; keep one copy of each and only search the new ones.
+        notifications = []
+        for notification in fetch_undelivered_notifications(client, after=after):
+            identity = _notification_identity(notification)
+            if identity not in seen:
+                seen.add(identity)
+                notifications.append(notification)
         collected.extend(notifications)
 
         if card_reference:
@@ -440,7 +707,11 @@ def poll_undelivered_notifications(
             break
 
         if attempt < max_attempts:
-            sleep_fn(backoff_seconds * (2 ** (attempt - 1)))
+            # Backoff is measured from the start of the attempt, so time spent signing
+            # and waiting on the response counts towards it instead of adding to it.
+            remaining = backoff_seconds * (backoff_factor ** (attempt - 1)) - (clock() - started)
+            if remaining > 0:
+                sleep_fn(remaining)
 
     if card_reference:
         if matched:
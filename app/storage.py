@@ -2,13 +2,22 @@
 
 from __future__ import annotations
 
-import json
+import logging
 import os
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List
+from typing import Callable, Iterable, List
 
-SENSITIVE_KEYS = {"pan", "full_pan", "card_number", "cvc", "cvv"}
+import orjson
+
+logger = logging.getLogger(__name__)
+
+SENSITIVE_KEYS = frozenset({"pan", "full_pan", "card_number", "cvc", "cvv"})
+
+# Views derived from a file (parsed JSON, indexes) keyed by path; an entry is valid
+# while the file's (mtime_ns, size) is unchanged.
+_CACHE: dict[Path, tuple[tuple[int, int] | None, dict[str, object]]] = {}
 
 
 def _data_dir(base_dir: str | Path | None = None) -> Path:
@@ -24,34 +33,93 @@ def _ensure_dir(path: Path) -> None:
 def _atomic_write(path: Path, payload: object) -> None:
     _ensure_dir(path.parent)
     tmp_path = path.with_suffix(path.suffix + f".tmp-{os.getpid()}")
+    blob = memoryview(orjson.dumps(payload, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE))
+    replaced = False
     try:
-        with tmp_path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, ensure_ascii=True, indent=2)
-            handle.flush()
-            os.fsync(handle.fileno())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            while blob:
+                blob = blob[os.write(fd, blob) :]
+            if _durable_writes():
+                os.fsync(fd)
+        finally:
+            os.close(fd)
         os.replace(tmp_path, path)
+        replaced = True
+        _CACHE.pop(path, None)
     finally:
-        if tmp_path.exists():
-            tmp_path.unlink()
+        if not replaced:
+            try:
+                tmp_path.unlink()
+            except FileNotFoundError:
+                pass
 
 
-def _read_json(path: Path, default: object) -> object:
-    if not path.exists():
+def _durable_writes() -> bool:
+    # fsync before the rename so a crash never leaves an empty file behind;
+    # DATA_DURABLE_WRITES=0 skips it for throwaway data (tests, local runs).
+    return os.getenv("DATA_DURABLE_WRITES", "1") != "0"
+
+
+def _stat_key(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _cached_view(path: Path, view: str, build: Callable[[], object]) -> object:
+    key = _stat_key(path)
+    entry = _CACHE.get(path)
+    if entry is None or entry[0] != key:
+        entry = (key, {})
+        _CACHE[path] = entry
+    views = entry[1]
+    if view not in views:
+        views[view] = build()
+    return views[view]
+
+
+def views_cached(filenames: Iterable[str], base_dir: str | Path | None = None) -> bool:
+    """True when every file already has a cache entry that matches it on disk."""
+    data_dir = _data_dir(base_dir)
+    for filename in filenames:
+        path = data_dir / filename
+        entry = _CACHE.get(path)
+        if entry is None or entry[0] != _stat_key(path):
+            return False
+    return True
+
+
+def _load_json_file(path: Path, default: object) -> object:
+    try:
+        return orjson.loads(path.read_bytes())
+    except FileNotFoundError:
         return default
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+
+
+def _read_json(path: Path, default: object) -> object:
+    return _cached_view(path, "json", lambda: _load_json_file(path, default))
+
+
+def _copy_records(items: list) -> list:
+    # Cached views are shared by every reader; hand out per-record copies so callers
+    # that update records in place (match keys, merged fields) never touch the cache.
+    # Callers only set top-level keys, so a shallow copy of each record is enough.
+    return [dict(item) if isinstance(item, dict) else item for item in items]
 
 
 def _validate_items(items: list, forbidden_keys: Iterable[str] | None = None) -> None:
     if not isinstance(items, list):
         raise ValueError("Expected a list of items")
+    forbidden = forbidden_keys if isinstance(forbidden_keys, frozenset) else frozenset(forbidden_keys or ())
     for item in items:
         if not isinstance(item, dict):
             raise ValueError("Expected each item to be a dict")
-        if forbidden_keys:
-            for key in item.keys():
-                if key in forbidden_keys:
-                    raise ValueError(f"Sensitive field not allowed in storage: {key}")
+        if not forbidden.isdisjoint(item):
+            key = next(key for key in item if key in forbidden)
+            raise ValueError(f"Sensitive field not allowed in storage: {key}")
 
 
 def read_list(filename: str, base_dir: str | Path | None = None) -> list:
@@ -59,7 +127,7 @@ def read_list(filename: str, base_dir: str | Path | None = None) -> list:
     data = _read_json(path, default=[])
     if not isinstance(data, list):
         raise ValueError("Stored data is not a list")
-    return data
+    return _copy_records(data)
 
 
 def write_list(
@@ -75,16 +143,110 @@ def write_list(
     _atomic_write(path, items)
 
 
+def read_versioned_list(filename: str, base_dir: str | Path | None = None) -> tuple[list, int]:
+    """Read a list stored either bare (version 0) or as ``{"version": N, "items": [...]}``."""
+    path = _data_dir(base_dir) / filename
+    data = _read_json(path, default=[])
+    if isinstance(data, list):
+        return _copy_records(data), 0
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return _copy_records(data["items"]), int(data.get("version") or 0)
+    raise ValueError("Stored data is not a list")
+
+
+def write_versioned_list(
+    filename: str,
+    items: list,
+    version: int,
+    base_dir: str | Path | None = None,
+    forbidden_keys: Iterable[str] | None = None,
+) -> None:
+    if forbidden_keys is None:
+        forbidden_keys = SENSITIVE_KEYS
+    _validate_items(items, forbidden_keys=forbidden_keys)
+    path = _data_dir(base_dir) / filename
+    _atomic_write(path, {"version": version, "items": items})
+
+
+def read_keyed(filename: str, key: str, base_dir: str | Path | None = None) -> dict:
+    """Read a ``{key_value: record}`` mapping; files in the older list format are keyed on read."""
+    path = _data_dir(base_dir) / filename
+    data = _read_json(path, default={})
+    if isinstance(data, list):
+        return key_items(_copy_records(data), key)
+    if not isinstance(data, dict):
+        raise ValueError("Stored data is not a mapping")
+    return {name: dict(item) if isinstance(item, dict) else item for name, item in data.items()}
+
+
+def key_items(items: list, key: str, strict: bool = False) -> dict:
+    """Key records by ``key``.
+
+    Records without a key are skipped and a repeated key keeps the last record, so an
+    old list-format file still loads; ``strict`` raises ValueError instead, for writes.
+    """
+    _validate_items(items)
+    keyed: dict = {}
+    for item in items:
+        value = item.get(key)
+        if not value:
+            if strict:
+                raise ValueError(f"Expected each item to have a {key}")
+            logger.warning("Skipping stored record without a %s", key)
+            continue
+        if value in keyed:
+            if strict:
+                raise ValueError(f"Duplicate {key} in items: {value}")
+            logger.warning("Duplicate %s in stored records, keeping the last: %s", key, value)
+        keyed[value] = item
+    return keyed
+
+
+def write_keyed(
+    filename: str,
+    items: dict,
+    base_dir: str | Path | None = None,
+    forbidden_keys: Iterable[str] | None = None,
+) -> None:
+    if not isinstance(items, dict):
+        raise ValueError("Expected a mapping of items")
+    if forbidden_keys is None:
+        forbidden_keys = SENSITIVE_KEYS
+    _validate_items(list(items.values()), forbidden_keys=forbidden_keys)
+    path = _data_dir(base_dir) / filename
+    _atomic_write(path, items)
+
+
 ENROLLMENTS_FILE = "enrollments.json"
 TRANSACTIONS_FILE = "transactions.json"
 NOTIFICATIONS_FILE = "notifications.json"
+# Positions of notifications by id and fingerprint, tagged with the stat key of the
+# notifications file they describe so a stale index is rebuilt instead of trusted.
+NOTIFICATIONS_INDEX_FILE = "notifications.index.json"
+# Records added or updated since the last full write of NOTIFICATIONS_FILE, one JSON
+# object per line. Replayed over the snapshot by id; folded back in on compaction.
+NOTIFICATIONS_LOG_FILE = "notifications.log.ndjson"
+# Compact once the log holds this many records or bytes, even if every record is new.
+NOTIFICATIONS_LOG_MAX_RECORDS = 1000
+NOTIFICATIONS_LOG_MAX_BYTES = 4 * 1024 * 1024
 PENDING_ENROLLMENTS_FILE = "pending_enrollments.json"
 PENDING_AUTH_FILE = "pending_authentications.json"
 
 
 def load_enrollments(base_dir: str | Path | None = None) -> list:
-    data = read_list(ENROLLMENTS_FILE, base_dir=base_dir)
-    return _dedupe_enrollments(data)
+    path = _data_dir(base_dir) / ENROLLMENTS_FILE
+    data = _cached_view(
+        path,
+        "enrollments",
+        lambda: _dedupe_enrollments(read_list(ENROLLMENTS_FILE, base_dir=base_dir)),
+    )
+    return _copy_records(data)
+
+
+def load_enrollment_index(base_dir: str | Path | None = None) -> "EnrollmentIndex":
+    path = _data_dir(base_dir) / ENROLLMENTS_FILE
+    index = _cached_view(path, "enrollment_index", lambda: EnrollmentIndex(load_enrollments(base_dir=base_dir)))
+    return index.copy()
 
 
 def save_enrollments(items: list, base_dir: str | Path | None = None) -> None:
@@ -92,65 +254,156 @@ def save_enrollments(items: list, base_dir: str | Path | None = None) -> None:
     write_list(ENROLLMENTS_FILE, deduped, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
 
 
+def save_enrollment_index(index: "EnrollmentIndex", base_dir: str | Path | None = None) -> None:
+    """Persist an index returned by `load_enrollment_index` and keep it as the cached view.
+
+    Upserts keep `index.items` unique, so the dedupe pass is skipped and the next
+    load reuses the index instead of re-reading and re-indexing the file.
+    """
+    write_list(ENROLLMENTS_FILE, index.items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+    path = _data_dir(base_dir) / ENROLLMENTS_FILE
+    _CACHE[path] = (_stat_key(path), {"enrollments": _copy_records(index.items), "enrollment_index": index.copy()})
+
+
 def _parse_created_at(value: object) -> float:
     if value in (None, ""):
         return 0.0
     if isinstance(value, (int, float)):
         return float(value)
     if isinstance(value, str):
-        text = value.strip()
-        if not text:
-            return 0.0
-        if text.endswith("Z"):
-            text = text[:-1] + "+00:00"
-        try:
-            return datetime.fromisoformat(text).astimezone(timezone.utc).timestamp()
-        except ValueError:
-            return 0.0
+        return _parse_created_at_text(value)
     return 0.0
 
 
-def _find_enrollment_index(enrollments: list, record: dict) -> int | None:
-    record_ref = record.get("card_reference")
-    if record_ref:
-        for idx, existing in enumerate(enrollments):
-            if existing.get("card_reference") == record_ref:
+# A record and the duplicate it is compared against usually carry the same
+# created_at text, and every save re-runs the dedupe over all enrollments.
+@lru_cache(maxsize=4096)
+def _parse_created_at_text(value: str) -> float:
+    text = value.strip()
+    if not text:
+        return 0.0
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return 0.0
+    # An aware datetime's timestamp() does not depend on its zone; only naive
+    # values need the local-time conversion.
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.timestamp()
+
+
+_ENROLLMENT_INDEX_KEYS = ("card_reference", "pan_last4", "consent_id", "id")
+
+
+class EnrollmentIndex:
+    """Enrollment list with hash lookups by card reference, last4 and consent id.
+
+    `find` matches on card_reference first, then on pan_last4 unless both records
+    carry different aliases, then on consent_id/id; each returns the earliest match.
+    """
+
+    def __init__(self, items: list) -> None:
+        self.items = items
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._by_ref: dict[str, int] = {}
+        self._by_last4: dict[str, list[int]] = {}
+        self._by_consent: dict[str, int] = {}
+        self.card_labels: dict[str, str] = {}
+        for idx, item in enumerate(self.items):
+            self._add(idx, item)
+
+    def _add(self, idx: int, item: dict) -> None:
+        ref = item.get("card_reference")
+        if ref:
+            self._by_ref.setdefault(ref, idx)
+        last4 = item.get("pan_last4")
+        if last4:
+            # Build a new list so copies never share mutable buckets.
+            self._by_last4[last4] = [*self._by_last4.get(last4, ()), idx]
+        for consent in (item.get("consent_id"), item.get("id")):
+            if consent:
+                self._by_consent.setdefault(consent, idx)
+        self._add_label(item)
+
+    def _add_label(self, item: dict) -> None:
+        label_ref = item.get("card_reference") or item.get("consent_id")
+        if label_ref:
+            self.card_labels[label_ref] = item.get("card_alias") or label_ref
+
+    def copy(self) -> "EnrollmentIndex":
+        clone = EnrollmentIndex.__new__(EnrollmentIndex)
+        clone.items = _copy_records(self.items)
+        clone._by_ref = dict(self._by_ref)
+        clone._by_last4 = dict(self._by_last4)
+        clone._by_consent = dict(self._by_consent)
+        clone.card_labels = dict(self.card_labels)
+        return clone
+
+    def find(self, record: dict) -> int | None:
+        record_ref = record.get("card_reference")
+        if record_ref:
+            idx = self._by_ref.get(record_ref)
+            if idx is not None:
                 return idx
-    record_last4 = record.get("pan_last4")
-    record_alias = record.get("card_alias")
-    if record_last4:
-        for idx, existing in enumerate(enrollments):
-            if existing.get("pan_last4") != record_last4:
-                continue
-            existing_alias = existing.get("card_alias")
-            if record_alias and existing_alias and record_alias != existing_alias:
-                continue
-            return idx
-    record_consent = record.get("consent_id") or record.get("id")
-    if record_consent:
-        for idx, existing in enumerate(enrollments):
-            if existing.get("consent_id") == record_consent or existing.get("id") == record_consent:
+        record_last4 = record.get("pan_last4")
+        record_alias = record.get("card_alias")
+        if record_last4:
+            for idx in self._by_last4.get(record_last4, ()):
+                existing_alias = self.items[idx].get("card_alias")
+                if record_alias and existing_alias and record_alias != existing_alias:
+                    continue
                 return idx
-    return None
+        record_consent = record.get("consent_id") or record.get("id")
+        if record_consent:
+            return self._by_consent.get(record_consent)
+        return None
+
+    def get_by_card_reference(self, card_reference: str | None) -> dict | None:
+        idx = self._by_ref.get(card_reference) if card_reference else None
+        return None if idx is None else self.items[idx]
+
+    def upsert(self, record: dict) -> None:
+        idx = self.find(record)
+        if idx is None:
+            self.append(record)
+        else:
+            self.replace(idx, {**self.items[idx], **record})
+
+    def append(self, record: dict) -> None:
+        self.items.append(record)
+        self._add(len(self.items) - 1, record)
+
+    def replace(self, idx: int, record: dict) -> None:
+        existing = self.items[idx]
+        self.items[idx] = record
+        if any(existing.get(key) != record.get(key) for key in _ENROLLMENT_INDEX_KEYS):
+            self._rebuild()
+        else:
+            self._add_label(record)
 
 
 def _dedupe_enrollments(items: list) -> list:
     if not items:
         return items
-    deduped: list = []
+    index = EnrollmentIndex([])
     for record in items:
         if not isinstance(record, dict):
             continue
-        idx = _find_enrollment_index(deduped, record)
+        idx = index.find(record)
         if idx is None:
-            deduped.append(record)
+            index.append(record)
             continue
-        existing = deduped[idx]
+        existing = index.items[idx]
         record_ts = _parse_created_at(record.get("created_at"))
         existing_ts = _parse_created_at(existing.get("created_at"))
         if record_ts >= existing_ts:
-            deduped[idx] = {**existing, **record}
-    return deduped
+            index.replace(idx, {**existing, **record})
+    return index.items
 
 
 def load_transactions(base_dir: str | Path | None = None) -> list:
@@ -161,25 +414,219 @@ def save_transactions(items: list, base_dir: str | Path | None = None) -> None:
     write_list(TRANSACTIONS_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
 
 
+def _load_ndjson_file(path: Path) -> list:
+    try:
+        raw = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    lines = raw.splitlines()
+    torn = b""
+    if raw and not raw.endswith(b"\n"):
+        # An append cut short by a crash leaves an unterminated last line; skip it
+        # if it does not parse (append_notifications truncates it on the next write).
+        torn = lines.pop()
+    records = [orjson.loads(line) for line in lines if line.strip()]
+    if torn.strip():
+        try:
+            records.append(orjson.loads(torn))
+        except orjson.JSONDecodeError:
+            pass
+    return records
+
+
+def _truncate_partial_line(handle) -> None:
+    """Cut an unterminated trailing line so the next append starts on a fresh line."""
+    end = handle.seek(0, os.SEEK_END)
+    if not end:
+        return
+    handle.seek(end - 1)
+    if handle.read(1) == b"\n":
+        return
+    pos = end
+    while pos > 0:
+        start = max(0, pos - 65536)
+        handle.seek(start)
+        cut = handle.read(pos - start).rfind(b"\n")
+        if cut != -1:
+            handle.truncate(start + cut + 1)
+            return
+        pos = start
+    handle.truncate(0)
+
+
+def _read_notification_log(data_dir: Path) -> list:
+    path = data_dir / NOTIFICATIONS_LOG_FILE
+    return _cached_view(path, "ndjson", lambda: _load_ndjson_file(path))
+
+
 def load_notifications(base_dir: str | Path | None = None) -> list:
-    return read_list(NOTIFICATIONS_FILE, base_dir=base_dir)
+    return load_notifications_versioned(base_dir=base_dir)[0]
+
+
+def load_notifications_versioned(base_dir: str | Path | None = None) -> tuple[list, int]:
+    data_dir = _data_dir(base_dir)
+    # The merged view lives with the snapshot's cache entry and also records the
+    # log's stat key, so it is rebuilt when either file changes.
+    log_key = _stat_key(data_dir / NOTIFICATIONS_LOG_FILE)
+    holder = _cached_view(data_dir / NOTIFICATIONS_FILE, "merged", dict)
+    merged = holder.get("latest")
+    if merged is None or merged[0] != log_key:
+        merged = (log_key, *_merge_notification_log(data_dir))
+        holder["latest"] = merged
+    return _copy_records(merged[1]), merged[2]
+
+
+def _merge_notification_log(data_dir: Path) -> tuple[list, int]:
+    items, version = read_versioned_list(NOTIFICATIONS_FILE, base_dir=data_dir)
+    log = _read_notification_log(data_dir)
+    if log:
+        positions = {str(item["id"]): idx for idx, item in enumerate(items) if item.get("id")}
+        for record in _copy_records(log):
+            key = str(record["id"]) if record.get("id") else None
+            if key in positions:
+                items[positions[key]] = record
+                continue
+            if key:
+                positions[key] = len(items)
+            items.append(record)
+    return items, version
+
+
+def save_notifications(items: list, base_dir: str | Path | None = None, version: int | None = None) -> None:
+    if version is None:
+        write_list(NOTIFICATIONS_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+    else:
+        write_versioned_list(NOTIFICATIONS_FILE, items, version, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+    # The snapshot now holds everything the log did.
+    log_path = _data_dir(base_dir) / NOTIFICATIONS_LOG_FILE
+    log_path.unlink(missing_ok=True)
+    _CACHE.pop(log_path, None)
+
+
+def append_notifications(records: list, base_dir: str | Path | None = None) -> None:
+    """Append new or updated records to the notification log without rewriting the snapshot."""
+    _validate_items(records, forbidden_keys=SENSITIVE_KEYS)
+    if not records:
+        return
+    data_dir = _data_dir(base_dir)
+    _ensure_dir(data_dir)
+    log_path = data_dir / NOTIFICATIONS_LOG_FILE
+    blob = b"".join(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records)
+    with log_path.open("a+b") as handle:
+        _truncate_partial_line(handle)
+        handle.write(blob)
+        if _durable_writes():
+            handle.flush()
+            os.fsync(handle.fileno())
+    _CACHE.pop(log_path, None)
+
+
+def _notifications_source(data_dir: Path) -> list:
+    keys = (_stat_key(data_dir / NOTIFICATIONS_FILE), _stat_key(data_dir / NOTIFICATIONS_LOG_FILE))
+    return [list(key) if key else None for key in keys]
 
 
-def save_notifications(items: list, base_dir: str | Path | None = None) -> None:
-    write_list(NOTIFICATIONS_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+def build_notification_index(records: list) -> tuple[dict, dict]:
+    # Ids are keyed as strings so the index survives a JSON round trip.
+    id_index: dict = {}
+    fingerprint_index: dict = {}
+    for position, record in enumerate(records):
+        if record.get("id"):
+            id_index[str(record["id"])] = position
+        if record.get("fingerprint"):
+            fingerprint_index[record["fingerprint"]] = position
+    return id_index, fingerprint_index
+
+
+def load_notification_index(records: list, base_dir: str | Path | None = None) -> tuple[dict, dict]:
+    """Id and fingerprint positions for ``records`` as loaded from the notifications file."""
+    data_dir = _data_dir(base_dir)
+    source = _notifications_source(data_dir)
+    index = _read_json(data_dir / NOTIFICATIONS_INDEX_FILE, default={})
+    if source[0] is None or not isinstance(index, dict) or index.get("source") != source:
+        return build_notification_index(records)
+    return dict(index.get("ids") or {}), dict(index.get("fingerprints") or {})
+
+
+def save_notifications_indexed(
+    items: list,
+    id_index: dict,
+    fingerprint_index: dict,
+    base_dir: str | Path | None = None,
+    version: int | None = None,
+    changed: list | None = None,
+    batch_hash: int | None = None,
+) -> None:
+    """Persist ``items`` and their index.
+
+    With ``changed`` (the records added or updated since load), only those are
+    appended to the log. Everything is compacted into the snapshot instead when
+    snapshot plus log would hold more than twice the live record count (repeated
+    updates), when the log would pass NOTIFICATIONS_LOG_MAX_RECORDS, or when it is
+    already over NOTIFICATIONS_LOG_MAX_BYTES (polls that only add new notifications).
+    """
+    data_dir = _data_dir(base_dir)
+    if changed is not None:
+        logged = len(_read_notification_log(data_dir)) + len(changed)
+        stored = len(read_versioned_list(NOTIFICATIONS_FILE, base_dir=data_dir)[0]) + logged
+        log_key = _stat_key(data_dir / NOTIFICATIONS_LOG_FILE)
+        if (
+            stored > 2 * len(items)
+            or logged > NOTIFICATIONS_LOG_MAX_RECORDS
+            or (log_key is not None and log_key[1] > NOTIFICATIONS_LOG_MAX_BYTES)
+        ):
+            changed = None
+    if changed is None:
+        save_notifications(items, base_dir=data_dir, version=version)
+    else:
+        append_notifications(changed, base_dir=data_dir)
+    _atomic_write(
+        data_dir / NOTIFICATIONS_INDEX_FILE,
+        {
+            "source": _notifications_source(data_dir),
+            "ids": id_index,
+            "fingerprints": fingerprint_index,
+            "batch_hash": batch_hash,
+        },
+    )
+
+
+def load_notification_batch_hash(base_dir: str | Path | None = None) -> int | None:
+    """Hash of the last merged poll batch, if the store is unchanged since it was written."""
+    data_dir = _data_dir(base_dir)
+    index = _read_json(data_dir / NOTIFICATIONS_INDEX_FILE, default={})
+    if not isinstance(index, dict) or index.get("source") != _notifications_source(data_dir):
+        return None
+    return index.get("batch_hash")
 
 
 def load_pending_enrollments(base_dir: str | Path | None = None) -> list:
-    return read_list(PENDING_ENROLLMENTS_FILE, base_dir=base_dir)
+    return list(load_pending_enrollments_by_state(base_dir=base_dir).values())
 
 
 def save_pending_enrollments(items: list, base_dir: str | Path | None = None) -> None:
-    write_list(PENDING_ENROLLMENTS_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+    save_pending_enrollments_by_state(key_items(items, "state", strict=True), base_dir=base_dir)
+
+
+def load_pending_enrollments_by_state(base_dir: str | Path | None = None) -> dict:
+    return read_keyed(PENDING_ENROLLMENTS_FILE, "state", base_dir=base_dir)
+
+
+def save_pending_enrollments_by_state(items: dict, base_dir: str | Path | None = None) -> None:
+    write_keyed(PENDING_ENROLLMENTS_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
 
 
 def load_pending_authentications(base_dir: str | Path | None = None) -> list:
-    return read_list(PENDING_AUTH_FILE, base_dir=base_dir)
+    return list(load_pending_authentications_by_state(base_dir=base_dir).values())
 
 
 def save_pending_authentications(items: list, base_dir: str | Path | None = None) -> None:
-    write_list(PENDING_AUTH_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
+    save_pending_authentications_by_state(key_items(items, "state", strict=True), base_dir=base_dir)
+
+
+def load_pending_authentications_by_state(base_dir: str | Path | None = None) -> dict:
+    return read_keyed(PENDING_AUTH_FILE, "state", base_dir=base_dir)
+
+
+def save_pending_authentications_by_state(items: dict, base_dir: str | Path | None = None) -> None:
+    write_keyed(PENDING_AUTH_FILE, items, base_dir=base_dir, forbidden_keys=SENSITIVE_KEYS)
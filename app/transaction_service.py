@@ -9,6 +9,11 @@ import secrets
 from uuid import uuid4
 
 from .mc_client import MastercardApiClient
+from .notification_service import MATCH_KEY_FIELD, notification_match_key, parse_timestamp
+
+POSTED_TS_FIELD = "_ts_posted"
+# Negated posted timestamp so newest-first listings can sort ascending.
+POSTED_SORT_FIELD = "_neg_ts_posted"
 
 
 @dataclass
@@ -33,7 +38,7 @@ class TransactionIdentifiers:
 
 
 def _random_numeric(length: int) -> str:
-    return "".join(str(secrets.randbelow(10)) for _ in range(length))
+    return f"{secrets.randbelow(10**length):0{length}d}"
 
 
 def generate_transaction_identifiers() -> TransactionIdentifiers:
@@ -104,8 +109,11 @@ def build_transaction_record(
     error: str | None = None,
     reference_number: str | None = None,
     system_trace_audit_number: str | None = None,
+    now: datetime | None = None,
 ) -> dict:
-    return {
+    if now is None:
+        now = datetime.now(timezone.utc)
+    record = {
         "id": str(uuid4()),
         "consent_id": consent_id,
         "card_reference": txn.card_reference,
@@ -114,13 +122,26 @@ def build_transaction_record(
         "currency": txn.currency,
         "merchant": txn.merchant_name,
         "status": status,
-        "posted_at": datetime.now(timezone.utc).isoformat(),
+        "posted_at": now.isoformat(),
         "correlation_id": correlation_id,
         "error": error,
         "reference_number": reference_number,
         "system_trace_audit_number": system_trace_audit_number,
         "source": "ui",
     }
+    record[MATCH_KEY_FIELD] = notification_match_key(record)
+    record[POSTED_TS_FIELD] = now.timestamp()
+    record[POSTED_SORT_FIELD] = -record[POSTED_TS_FIELD]
+    return record
+
+
+def ensure_posted_timestamp(record: dict) -> bool:
+    if POSTED_SORT_FIELD in record:
+        return False
+    if POSTED_TS_FIELD not in record:
+        record[POSTED_TS_FIELD] = parse_timestamp(record.get("posted_at") or record.get("created_at"))
+    record[POSTED_SORT_FIELD] = -record[POSTED_TS_FIELD]
+    return True
 
 
 def post_transaction(
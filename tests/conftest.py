@@ -2,6 +2,7 @@ import sys
 from pathlib import Path
 
 import pytest
+import responses
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
@@ -10,12 +11,36 @@ if str(ROOT) not in sys.path:
 from app import create_app  # noqa: E402
 
 
-@pytest.fixture
+# Test data is throwaway, so skip the fsync storage does before each replace.
+# test_storage re-enables it where the durable path itself is under test.
+@pytest.fixture(scope="session", autouse=True)
+def _fast_storage_writes():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATA_DURABLE_WRITES", "0")
+        yield
+
+
+# One app for the whole run: tests vary DATA_DIR and the API clients with
+# monkeypatch.setitem(app.config, ...) so each change is undone at teardown.
+@pytest.fixture(scope="session")
 def app():
     app = create_app({"TESTING": True, "APP_NAME": "Test App"})
     yield app
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client(app):
     return app.test_client()
+
+
+# Data directory for tests that never write to it (or fail validation before
+# writing); anything that saves records keeps using its own tmp_path.
+@pytest.fixture(scope="module")
+def shared_data_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("data")
+
+
+@pytest.fixture
+def mocked_responses():
+    with responses.RequestsMock() as rsps:
+        yield rsps
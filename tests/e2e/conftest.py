@@ -0,0 +1,12 @@
+import os
+
+import pytest
+
+from app.config import load_env
+
+
+# Read .env once per module, and only when the sandbox tests will actually run.
+@pytest.fixture(scope="module", autouse=True)
+def _e2e_env():
+    if os.getenv("RUN_E2E") == "1":
+        load_env()
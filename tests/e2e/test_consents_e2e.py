@@ -2,7 +2,6 @@ import os
 
 import pytest
 
-from app.config import load_env
 from app.consent_service import CardDetails, build_consent_payload
 from app.encryption import encrypt_payload_if_configured
 from app.mc_client import MastercardApiClient, MastercardApiError, validate_env_and_keystore
@@ -15,7 +14,6 @@ def _require_e2e_enabled():
     if os.getenv("RUN_E2E") != "1":
         pytest.skip("RUN_E2E is not set to 1")
 
-    load_env()
     if not os.getenv("MC_ENCRYPTION_CERT_PATH"):
         pytest.skip("MC_ENCRYPTION_CERT_PATH is not set (payload encryption required)")
     try:
@@ -1,10 +1,10 @@
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 
 import pytest
+from requests import Session
 
-from app.config import load_env
 from app.consent_service import CardDetails, build_consent_payload
 from app.encryption import encrypt_payload_if_configured
 from app.mc_client import MastercardApiClient, MastercardApiError, validate_env_and_keystore
@@ -18,12 +18,14 @@ from app.transaction_service import (
 
 pytestmark = pytest.mark.e2e
 
+_AMOUNT_MATCHES = frozenset({"12.34", "12.340", "12.3400"})
+_MERCHANT_UPPER = "CODEX DEMO"
+
 
 def _require_e2e_enabled():
     if os.getenv("RUN_E2E") != "1":
         pytest.skip("RUN_E2E is not set to 1")
 
-    load_env()
     if not os.getenv("MC_ENCRYPTION_CERT_PATH"):
         pytest.skip("MC_ENCRYPTION_CERT_PATH is not set (payload encryption required for consent)")
     try:
@@ -32,9 +34,9 @@ def _require_e2e_enabled():
         pytest.skip(str(exc))
 
 
-def _create_test_consent() -> str:
+def _create_test_consent(session: Session) -> str:
     base_url = os.getenv("MC_BASE_URL_CONSENTS", "https://sandbox.api.mastercard.com/openapis/authentication")
-    client = MastercardApiClient.from_env(base_url)
+    client = MastercardApiClient.from_env(base_url, session=session)
 
     card = CardDetails(
         pan="2303779951000297",
@@ -63,9 +65,11 @@ def _create_test_consent() -> str:
 def test_transaction_notifications_e2e():
     _require_e2e_enabled()
 
-    card_reference = _create_test_consent()
     base_url = os.getenv("MC_BASE_URL_TXN_NOTIF", "https://sandbox.api.mastercard.com/openapis")
     client = MastercardApiClient.from_env(base_url)
+    # Reuse the client's session so the consent, transaction and poll calls share
+    # one keep-alive connection to the sandbox host.
+    card_reference = _create_test_consent(client.session)
 
     identifiers = generate_transaction_identifiers()
     txn = TransactionInput(
@@ -94,8 +98,11 @@ def test_transaction_notifications_e2e():
         result = poll_undelivered_notifications(
             client,
             card_reference=None,
-            max_attempts=5,
-            backoff_seconds=2.0,
+            # 0.25s, 0.5s, 1s, ... keeps the ~30s worst case but returns quickly
+            # when the notification is already queued.
+            max_attempts=8,
+            backoff_seconds=0.25,
+            backoff_factor=2.0,
         )
     except MastercardApiError as exc:
         pytest.fail(
@@ -103,7 +110,7 @@ def test_transaction_notifications_e2e():
             f"{exc} (reason={exc.reason_code}, correlation={exc.correlation_id})"
         )
 
-    records = [build_notification_record(item) for item in result.notifications]
+    records = (build_notification_record(item) for item in result.notifications)
 
     def _parse_time(value):
         if not value:
@@ -112,7 +119,11 @@ def test_transaction_notifications_e2e():
             return float(value)
         text = str(value).strip()
         if text.endswith("Z"):
-            text = text[:-1] + "+00:00"
+            # Sandbox timestamps are UTC with a "Z" suffix; skip the offset fixups.
+            try:
+                return datetime.fromisoformat(text[:-1]).replace(tzinfo=timezone.utc).timestamp()
+            except ValueError:
+                return None
         if len(text) >= 5 and text[-5] in "+-" and text[-2:].isdigit() and text[-4:-2].isdigit():
             if text[-3] != ":":
                 text = text[:-2] + ":" + text[-2:]
@@ -129,8 +140,8 @@ def test_transaction_notifications_e2e():
             record
             for record in records
             if record.get("card_reference") == card_reference
-            and _norm(record.get("merchant")) == "CODEX DEMO"
-            and str(record.get("amount")) in {"12.34", "12.340", "12.3400"}
+            and str(record.get("amount")) in _AMOUNT_MATCHES
+            and _norm(record.get("merchant")) == _MERCHANT_UPPER
             and _norm(record.get("currency")) == "USD"
             and (_parse_time(record.get("event_time") or record.get("received_at")) or 0) >= start_time - 120
         ),
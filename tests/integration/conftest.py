@@ -0,0 +1,20 @@
+import pytest
+
+from app.mc_client import ClientConfig, MastercardApiClient
+
+
+class DummySigner:
+    def sign_request(self, uri, request):
+        request.headers["Authorization"] = "OAuth dummy"
+        return request
+
+
+@pytest.fixture(scope="module")
+def fake_mc_client():
+    return MastercardApiClient(
+        config=ClientConfig(base_url="https://example.test"),
+        consumer_key="ck",
+        keystore_path="/tmp/none",
+        keystore_password="pw",
+        signer=DummySigner(),
+    )
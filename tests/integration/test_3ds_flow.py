@@ -1,15 +1,12 @@
 from pathlib import Path
 
+import pytest
 import responses
 
 from app import storage
-from app.mc_client import ClientConfig, MastercardApiClient
 
 
-class DummySigner:
-    def sign_request(self, uri, request):
-        request.headers["Authorization"] = "OAuth dummy"
-        return request
+pytestmark = pytest.mark.integration
 
 
 def _seed_pending_auth(tmp_path: Path, state: str, card_reference: str):
@@ -35,31 +32,24 @@ def _seed_pending_auth(tmp_path: Path, state: str, card_reference: str):
     )
 
 
-def test_start_authentication_frictionless(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_start_authentication_frictionless(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENTS_CLIENT", fake_mc_client)
 
     state = "state-1"
     card_reference = "card-ref-1"
     _seed_pending_auth(tmp_path, state, card_reference)
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            f"https://example.test/consents/{card_reference}/start-authentication",
-            json={"cardReference": card_reference, "auth": {"type": "THREEDS", "status": "AUTHENTICATED"}},
-            status=200,
-        )
-        resp = client.post(
-            "/enroll/3ds/start-authentication",
-            data={"state": state, "fingerprintStatus": "complete"},
-        )
+    mocked_responses.add(
+        responses.POST,
+        f"https://example.test/consents/{card_reference}/start-authentication",
+        json={"cardReference": card_reference, "auth": {"type": "THREEDS", "status": "AUTHENTICATED"}},
+        status=200,
+    )
+    resp = client.post(
+        "/enroll/3ds/start-authentication",
+        data={"state": state, "fingerprintStatus": "complete"},
+    )
 
     assert resp.status_code == 200
     enrollments = storage.load_enrollments(base_dir=tmp_path)
@@ -68,46 +58,8 @@ def test_start_authentication_frictionless(app, client, tmp_path: Path):
     assert pending == []
 
 
-def test_start_authentication_challenge(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
-
-    state = "state-2"
-    card_reference = "card-ref-2"
-    _seed_pending_auth(tmp_path, state, card_reference)
-
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            f"https://example.test/consents/{card_reference}/start-authentication",
-            json={
-                "cardReference": card_reference,
-                "auth": {
-                    "type": "THREEDS",
-                    "status": "AUTH_IN_PROGRESS",
-                    "params": {"acsUrl": "https://acs.example.test", "encodedCReq": "creq"},
-                },
-            },
-            status=200,
-        )
-        resp = client.post(
-            "/enroll/3ds/start-authentication",
-            data={"state": state, "fingerprintStatus": "complete"},
-        )
-
-    assert resp.status_code == 200
-    body = resp.data.decode("utf-8")
-    assert "3DS Challenge" in body
-
-
-def test_fingerprint_page_renders(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
+def test_fingerprint_page_renders(app, client, tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
     state = "state-4"
     card_reference = "card-ref-4"
     _seed_pending_auth(tmp_path, state, card_reference)
@@ -118,65 +70,61 @@ def test_fingerprint_page_renders(app, client, tmp_path: Path):
     assert "3DS Fingerprinting" in body
 
 
-def test_start_authentication_missing_challenge_params(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+@pytest.mark.parametrize(
+    ("params", "expected"),
+    [
+        ({"acsUrl": "https://acs.example.test", "encodedCReq": "creq"}, "3DS Challenge"),
+        ({}, "Challenge parameters missing"),
+    ],
+    ids=["challenge", "missing_challenge_params"],
+)
+def test_start_authentication_in_progress(
+    app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses, params, expected
+):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENTS_CLIENT", fake_mc_client)
 
-    state = "state-5"
-    card_reference = "card-ref-5"
+    state = "state-2"
+    card_reference = "card-ref-2"
     _seed_pending_auth(tmp_path, state, card_reference)
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            f"https://example.test/consents/{card_reference}/start-authentication",
-            json={
-                "cardReference": card_reference,
-                "auth": {"type": "THREEDS", "status": "AUTH_IN_PROGRESS", "params": {}},
-            },
-            status=200,
-        )
-        resp = client.post(
-            "/enroll/3ds/start-authentication",
-            data={"state": state, "fingerprintStatus": "complete"},
-        )
+    mocked_responses.add(
+        responses.POST,
+        f"https://example.test/consents/{card_reference}/start-authentication",
+        json={
+            "cardReference": card_reference,
+            "auth": {"type": "THREEDS", "status": "AUTH_IN_PROGRESS", "params": params},
+        },
+        status=200,
+    )
+    resp = client.post(
+        "/enroll/3ds/start-authentication",
+        data={"state": state, "fingerprintStatus": "complete"},
+    )
 
     assert resp.status_code == 200
-    assert "Challenge parameters missing" in resp.data.decode("utf-8")
+    assert expected in resp.data.decode("utf-8")
 
 
-def test_verify_authentication_success(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_verify_authentication_success(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENTS_CLIENT", fake_mc_client)
 
     state = "state-3"
     card_reference = "card-ref-3"
     _seed_pending_auth(tmp_path, state, card_reference)
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            f"https://example.test/consents/{card_reference}/verify-authentication",
-            json={
-                "cardReference": card_reference,
-                "auth": {"type": "THREEDS", "status": "AUTHENTICATED"},
-                "consents": [{"id": "consent-3", "status": "APPROVED"}],
-            },
-            status=200,
-        )
-        resp = client.get(f"/enroll/3ds/verify?state={state}")
+    mocked_responses.add(
+        responses.POST,
+        f"https://example.test/consents/{card_reference}/verify-authentication",
+        json={
+            "cardReference": card_reference,
+            "auth": {"type": "THREEDS", "status": "AUTHENTICATED"},
+            "consents": [{"id": "consent-3", "status": "APPROVED"}],
+        },
+        status=200,
+    )
+    resp = client.get(f"/enroll/3ds/verify?state={state}")
 
     assert resp.status_code == 200
     enrollments = storage.load_enrollments(base_dir=tmp_path)
@@ -1,15 +1,26 @@
-from datetime import datetime, timezone
 from pathlib import Path
 
 import jwt
+import pytest
 
 from app import storage
 
 
-def test_enroll_ui_start_creates_pending(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENT_UI_JWT"] = "dummy.jwt"
-    app.config["CONSENT_UI_SRC"] = "https://consents.mastercard.com"
+pytestmark = pytest.mark.integration
+
+# HS256 with key "secret" and header kid "test-kid"; claims iat/nbf 2026-01-01T00:00:00Z,
+# exp 2**31 - 1, jti "test", appdata.callbackURL "http://localhost".
+_DEBUG_JWT = (
+    "eyJhbGciOiJIUzI1NiIsImtpZCI6InRlc3Qta2lkIiwidHlwIjoiSldUIn0"
+    ".eyJpYXQiOjE3NjcyMjU2MDAsIm5iZiI6MTc2NzIyNTYwMCwiZXhwIjoyMTQ3NDgzNjQ3LCJqdGkiOiJ0ZXN0IiwiYXBwZGF0YSI6eyJjYWxsYmFja1VSTCI6Imh0dHA6Ly9sb2NhbGhvc3QifX0"
+    ".WqB-PM2bECAWoidJtKmJgkQcNnDIP-WEwGh6EdKI_zw"
+)
+
+
+def test_enroll_ui_start_creates_pending(app, client, tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENT_UI_JWT", "dummy.jwt")
+    monkeypatch.setitem(app.config, "CONSENT_UI_SRC", "https://consents.mastercard.com")
 
     resp = client.get("/enroll/ui/start")
     assert resp.status_code == 200
@@ -21,10 +32,10 @@ def test_enroll_ui_start_creates_pending(app, client, tmp_path: Path):
     assert pending[0]["state"]
 
 
-def test_enroll_ui_frame_renders_consent_ui(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENT_UI_JWT"] = "dummy.jwt"
-    app.config["CONSENT_UI_SRC"] = "https://consents.mastercard.com"
+def test_enroll_ui_frame_renders_consent_ui(app, client, tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENT_UI_JWT", "dummy.jwt")
+    monkeypatch.setitem(app.config, "CONSENT_UI_SRC", "https://consents.mastercard.com")
 
     state = "state-iframe"
     storage.save_pending_enrollments(
@@ -38,8 +49,8 @@ def test_enroll_ui_frame_renders_consent_ui(app, client, tmp_path: Path):
     assert "ConsentUI.js" in html
 
 
-def test_enroll_ui_callback_success(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
+def test_enroll_ui_callback_success(app, client, tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
 
     state = "state-123"
     storage.save_pending_enrollments(
@@ -61,6 +72,26 @@ def test_enroll_ui_callback_success(app, client, tmp_path: Path):
     assert pending == []
 
 
+def test_enroll_ui_signed_state_round_trip(app, client, tmp_path: Path, monkeypatch):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENT_UI_JWT", "dummy.jwt")
+    monkeypatch.setitem(app.config, "CONSENT_UI_SRC", "https://consents.mastercard.com")
+
+    client.get("/enroll/ui/start")
+    state = storage.load_pending_enrollments(base_dir=tmp_path)[0]["state"]
+    (tmp_path / storage.PENDING_ENROLLMENTS_FILE).unlink()
+
+    # Frame and intermediate messages verify the signature without the pending store.
+    assert client.get(f"/enroll/ui/frame?state={state}").status_code == 200
+    resp = client.post("/enroll/ui/callback", json={"state": state, "message": {"type": "Resize"}})
+    assert resp.get_json()["message"] == "Message received"
+
+    # Terminal messages still require the one-time pending entry.
+    closing = {"state": state, "message": {"type": "Close", "data": {"status": "success", "cardReference": "c"}}}
+    assert client.post("/enroll/ui/callback", json=closing).status_code == 404
+    assert client.get("/enroll/ui/frame?state=forged.state.token").status_code == 404
+
+
 def test_enroll_ui_callback_unknown_state(client):
     payload = {
         "state": "missing",
@@ -83,23 +114,41 @@ def test_debug_consent_ui_jwt_disabled(client, monkeypatch):
 
 def test_debug_consent_ui_jwt_enabled(client, monkeypatch):
     monkeypatch.setenv("MC_DEBUG_CONSENT_UI", "1")
-    now = int(datetime.now(timezone.utc).timestamp())
-    token = jwt.encode(
-        {
-            "iat": now,
-            "nbf": now,
-            "exp": now + 300,
-            "jti": "test",
-            "appdata": {"callbackURL": "http://localhost"},
-        },
-        "secret",
-        algorithm="HS256",
-        headers={"typ": "JWT", "kid": "test-kid"},
-    )
-    client.application.config["CONSENT_UI_JWT"] = token
+    monkeypatch.setitem(client.application.config, "CONSENT_UI_JWT", _DEBUG_JWT)
 
     resp = client.get("/debug/consent-ui-jwt")
     assert resp.status_code == 200
     payload = resp.get_json()
     assert payload["header"]["kid"] == "test-kid"
-    assert payload["token"] == token
+    assert payload["token"] == _DEBUG_JWT
+
+
+def test_generate_consent_ui_jwt_reuses_token_per_origin(monkeypatch, tmp_path: Path):
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    from app import consent_ui
+
+    keystore = tmp_path / "keystore.p12"
+    keystore.write_bytes(b"p12")
+    monkeypatch.setenv("MC_CONSUMER_KEY", "test-kid")
+    monkeypatch.setenv("MC_KEYSTORE_PATH", str(keystore))
+    monkeypatch.setenv("MC_KEYSTORE_PASSWORD", "secret")
+    signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    monkeypatch.setattr(consent_ui, "load_signing_key", lambda path, password: signing_key)
+    monkeypatch.setattr(consent_ui, "_JWT_CACHE", {})
+
+    first = consent_ui.generate_consent_ui_jwt("http://localhost")
+    assert consent_ui.generate_consent_ui_jwt("http://localhost") == first
+    other = consent_ui.generate_consent_ui_jwt("http://example.test")
+    assert other != first
+    claims = jwt.decode(other, options={"verify_signature": False})
+    assert claims["appdata"]["callbackURL"] == "http://example.test"
+    assert "jti" not in claims
+    # Alternating origins keep both tokens instead of evicting each other.
+    assert consent_ui.generate_consent_ui_jwt("http://localhost") == first
+    assert consent_ui.generate_consent_ui_jwt("http://example.test") == other
+
+    monkeypatch.setattr(consent_ui, "_JWT_CACHE_SIZE", 2)
+    consent_ui.generate_consent_ui_jwt("http://third.test")
+    assert len(consent_ui._JWT_CACHE) == 2
+    assert consent_ui.generate_consent_ui_jwt("http://example.test") == other
@@ -4,24 +4,14 @@ import pytest
 import responses
 
 from app import storage
-from app.mc_client import ClientConfig, MastercardApiClient
 
 
-class DummySigner:
-    def sign_request(self, uri, request):
-        request.headers["Authorization"] = "OAuth dummy"
-        return request
+pytestmark = pytest.mark.integration
 
 
-def test_enroll_api_success(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_enroll_api_success(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENTS_CLIENT", fake_mc_client)
 
     payload = {
         "pan": "2303779951000297",
@@ -32,20 +22,19 @@ def test_enroll_api_success(app, client, tmp_path: Path):
         "consent_name": "notification",
     }
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            "https://example.test/consents",
-            json={
-                "cardReference": "card-ref-1",
-                "consents": [
-                    {"id": "consent-1", "status": "APPROVED", "name": "notification"}
-                ],
-                "auth": {"status": "AUTHENTICATED"},
-            },
-            status=200,
-        )
-        resp = client.post("/enroll/api", json=payload)
+    mocked_responses.add(
+        responses.POST,
+        "https://example.test/consents",
+        json={
+            "cardReference": "card-ref-1",
+            "consents": [
+                {"id": "consent-1", "status": "APPROVED", "name": "notification"}
+            ],
+            "auth": {"status": "AUTHENTICATED"},
+        },
+        status=200,
+    )
+    resp = client.post("/enroll/api", json=payload)
 
     assert resp.status_code == 200
     data = resp.get_json()
@@ -62,15 +51,9 @@ def test_enroll_api_missing_fields(client):
     assert data["success"] is False
 
 
-def test_enroll_api_requires_3ds(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["CONSENTS_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_enroll_api_requires_3ds(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "CONSENTS_CLIENT", fake_mc_client)
 
     payload = {
         "pan": "2303779951000297",
@@ -81,27 +64,26 @@ def test_enroll_api_requires_3ds(app, client, tmp_path: Path):
         "consent_name": "notification",
     }
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            "https://example.test/consents",
-            json={
-                "cardReference": "card-ref-3",
-                "consents": [{"id": "consent-3", "status": "REQAUTH", "name": "notification"}],
-                "auth": {
-                    "type": "THREEDS",
-                    "status": "AUTH_READY_TO_START",
-                    "params": {
-                        "threeDsMethodUrl": "https://acs.example.test",
-                        "threeDSMethodNotificationURL": "https://notify.example.test",
-                        "threeDSMethodData": "data",
-                        "threeDSServerTransID": "trans-id",
-                    },
+    mocked_responses.add(
+        responses.POST,
+        "https://example.test/consents",
+        json={
+            "cardReference": "card-ref-3",
+            "consents": [{"id": "consent-3", "status": "REQAUTH", "name": "notification"}],
+            "auth": {
+                "type": "THREEDS",
+                "status": "AUTH_READY_TO_START",
+                "params": {
+                    "threeDsMethodUrl": "https://acs.example.test",
+                    "threeDSMethodNotificationURL": "https://notify.example.test",
+                    "threeDSMethodData": "data",
+                    "threeDSServerTransID": "trans-id",
                 },
             },
-            status=200,
-        )
-        resp = client.post("/enroll/api", json=payload)
+        },
+        status=200,
+    )
+    resp = client.post("/enroll/api", json=payload)
 
     assert resp.status_code == 200
     data = resp.get_json()
@@ -1,3 +1,9 @@
+import pytest
+
+
+pytestmark = pytest.mark.integration
+
+
 def test_healthz(client):
     resp = client.get("/healthz")
     assert resp.status_code == 200
@@ -1,62 +1,67 @@
 from pathlib import Path
 
+import pytest
 import responses
 
 from app import storage
-from app.mc_client import ClientConfig, MastercardApiClient
 
 
-class DummySigner:
-    def sign_request(self, uri, request):
-        request.headers["Authorization"] = "OAuth dummy"
-        return request
+pytestmark = pytest.mark.integration
 
 
-def test_get_undelivered_notifications(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["TXN_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_get_undelivered_notifications(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "TXN_CLIENT", fake_mc_client)
 
     payload = {"notifications": [{"cardReference": "card-1", "id": "note-1"}]}
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.GET,
-            "https://example.test/notifications/undelivered-notifications",
-            json=payload,
-            status=200,
-        )
-        resp = client.get("/notifications/undelivered?card_reference=card-1")
+    mocked_responses.add(
+        responses.GET,
+        "https://example.test/notifications/undelivered-notifications",
+        json=payload,
+        status=200,
+    )
+    resp = client.get("/notifications/undelivered?card_reference=card-1")
 
     assert resp.status_code == 200
     stored = storage.load_notifications(base_dir=tmp_path)
     assert stored[0]["card_reference"] == "card-1"
 
 
-def test_get_undelivered_notifications_not_found(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["TXN_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_get_undelivered_notifications_not_found(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "TXN_CLIENT", fake_mc_client)
 
     payload = {"notifications": []}
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.GET,
-            "https://example.test/notifications/undelivered-notifications",
-            json=payload,
-            status=200,
-        )
-        resp = client.get("/notifications/undelivered?card_reference=missing")
+    mocked_responses.add(
+        responses.GET,
+        "https://example.test/notifications/undelivered-notifications",
+        json=payload,
+        status=200,
+    )
+    resp = client.get("/notifications/undelivered?card_reference=missing")
 
     assert resp.status_code == 404
+
+
+def test_repeated_undelivered_batch_is_not_rewritten(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "TXN_CLIENT", fake_mc_client)
+
+    payload = {"notifications": [{"cardReference": "card-1", "id": "note-1"}]}
+
+    mocked_responses.add(
+        responses.GET,
+        "https://example.test/notifications/undelivered-notifications",
+        json=payload,
+        status=200,
+    )
+    client.get("/notifications/undelivered?card_reference=card-1")
+    index_mtime = (tmp_path / storage.NOTIFICATIONS_INDEX_FILE).stat().st_mtime_ns
+    resp = client.get("/notifications/undelivered?card_reference=card-1")
+
+    assert resp.status_code == 200
+    assert resp.get_json()["stored"] == 1
+    assert (tmp_path / storage.NOTIFICATIONS_INDEX_FILE).stat().st_mtime_ns == index_mtime
+    assert len(storage.load_notifications(base_dir=tmp_path)) == 1
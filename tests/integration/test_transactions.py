@@ -1,26 +1,17 @@
 from pathlib import Path
 
+import pytest
 import responses
 
 from app import storage
-from app.mc_client import ClientConfig, MastercardApiClient
 
 
-class DummySigner:
-    def sign_request(self, uri, request):
-        request.headers["Authorization"] = "OAuth dummy"
-        return request
+pytestmark = pytest.mark.integration
 
 
-def test_post_transaction_success(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["TXN_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_post_transaction_success(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "TXN_CLIENT", fake_mc_client)
 
     payload = {
         "consent_id": "card-ref-1",
@@ -29,14 +20,13 @@ def test_post_transaction_success(app, client, tmp_path: Path):
         "merchant": "Demo Store",
     }
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            "https://example.test/notifications/transactions",
-            json={},
-            status=200,
-        )
-        resp = client.post("/transactions", data=payload)
+    mocked_responses.add(
+        responses.POST,
+        "https://example.test/notifications/transactions",
+        json={},
+        status=200,
+    )
+    resp = client.post("/transactions", data=payload)
 
     assert resp.status_code == 200
     stored = storage.load_transactions(base_dir=tmp_path)
@@ -51,15 +41,9 @@ def test_post_transaction_missing_fields(client):
     assert resp.status_code == 400
 
 
-def test_post_transaction_json_success(app, client, tmp_path: Path):
-    app.config["DATA_DIR"] = tmp_path
-    app.config["TXN_CLIENT"] = MastercardApiClient(
-        config=ClientConfig(base_url="https://example.test"),
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
+def test_post_transaction_json_success(app, client, tmp_path: Path, fake_mc_client, monkeypatch, mocked_responses):
+    monkeypatch.setitem(app.config, "DATA_DIR", tmp_path)
+    monkeypatch.setitem(app.config, "TXN_CLIENT", fake_mc_client)
 
     payload = {
         "card_reference": "card-ref-2",
@@ -68,14 +52,13 @@ def test_post_transaction_json_success(app, client, tmp_path: Path):
         "merchant": "Demo Shop",
     }
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(
-            responses.POST,
-            "https://example.test/notifications/transactions",
-            json={},
-            status=200,
-        )
-        resp = client.post("/transactions", json=payload)
+    mocked_responses.add(
+        responses.POST,
+        "https://example.test/notifications/transactions",
+        json={},
+        status=200,
+    )
+    resp = client.post("/transactions", json=payload)
 
     assert resp.status_code == 200
     data = resp.get_json()
@@ -1,6 +1,11 @@
+import pytest
 
-def test_index_renders_tabs(client, tmp_path):
-    client.application.config["DATA_DIR"] = tmp_path
+
+pytestmark = pytest.mark.integration
+
+
+def test_index_renders_tabs(client, shared_data_dir, monkeypatch):
+    monkeypatch.setitem(client.application.config, "DATA_DIR", shared_data_dir)
     response = client.get("/")
     assert response.status_code == 200
     body = response.data.decode("utf-8")
@@ -11,3 +16,30 @@ def test_index_renders_tabs(client, tmp_path):
     assert "Post a transaction" in body
     assert "Dashboard" in body
     assert "No enrollments yet" in body
+
+
+def test_dashboard_backfills_cached_timestamps(client, tmp_path, monkeypatch):
+    from app import storage
+
+    monkeypatch.setitem(client.application.config, "DATA_DIR", tmp_path)
+    storage.save_transactions(
+        [
+            {"id": "txn-older", "posted_at": "2026-01-01T00:00:00+00:00"},
+            {"id": "txn-newer", "posted_at": "2026-01-02T00:00:00Z"},
+        ],
+        base_dir=tmp_path,
+    )
+    response = client.get("/?tab=dashboard")
+    assert response.status_code == 200
+    body = response.data.decode("utf-8")
+    assert body.index("txn-newer") < body.index("txn-older")
+    stored = storage.load_transactions(base_dir=tmp_path)
+    assert all("_ts_posted" in txn and "_neg_ts_posted" in txn for txn in stored)
+
+
+def test_dashboard_tab_reloads_when_notifications_not_rendered(client, shared_data_dir, monkeypatch):
+    monkeypatch.setitem(client.application.config, "DATA_DIR", shared_data_dir)
+    body = client.get("/?tab=enroll").data.decode("utf-8")
+    assert 'data-href="/?tab=dashboard"' in body
+    body = client.get("/?tab=dashboard").data.decode("utf-8")
+    assert 'data-href="/?tab=dashboard"' not in body
@@ -1,3 +1,5 @@
+import pytest
+
 from app.consent_service import CardDetails, build_consent_payload, parse_auth_details, parse_card_details
 
 
@@ -32,3 +34,19 @@ def test_parse_auth_details_handles_missing_auth():
     assert auth.auth_type is None
     assert auth.auth_status is None
     assert auth.auth_params == {}
+
+
+def test_parse_card_details_rejects_non_digit_pan():
+    payload = {
+        "pan": "2303-7799-5100-0",
+        "expiry_month": 12,
+        "expiry_year": 2030,
+        "cvc": "123",
+        "cardholder_name": "John Doe",
+    }
+    with pytest.raises(ValueError, match="PAN"):
+        parse_card_details(payload)
+
+    payload.update(pan=" 2303779951000297 ", cvc="12a")
+    with pytest.raises(ValueError, match="CVC"):
+        parse_card_details(payload)
@@ -0,0 +1,15 @@
+from decimal import Decimal
+
+from app.json_provider import OrjsonProvider
+
+
+def test_jsonify_uses_orjson_provider(app):
+    assert isinstance(app.json, OrjsonProvider)
+    with app.app_context():
+        resp = app.json.response({"b": 1, "a": Decimal("1.50")})
+    assert resp.get_json() == {"a": "1.50", "b": 1}
+
+
+def test_dumps_sorts_keys_and_indents(app):
+    text = app.json.dumps({"b": 1, "a": 2}, indent=2)
+    assert text == '{\n  "a": 2,\n  "b": 1\n}'
@@ -1,22 +1,40 @@
 import json
+import os
 from pathlib import Path
 
 import pytest
 import responses
 
-from app.mc_client import ClientConfig, MastercardApiClient, MastercardApiError, validate_env_and_keystore
+from app import mc_client
+from app.mc_client import (
+    ClientConfig,
+    MastercardApiClient,
+    MastercardApiError,
+    _redact_payload,
+    load_signing_key,
+    validate_env_and_keystore,
+)
 
 
 class DummySigner:
-    def __init__(self):
-        self.calls = []
-
     def sign_request(self, uri, request):
         request.headers["Authorization"] = "OAuth dummy"
-        self.calls.append(uri)
         return request
 
 
+# backoff_seconds=0 keeps the retry test from sleeping; the other tests pass
+# allow_retry=False.
+@pytest.fixture(scope="module")
+def api_client():
+    return MastercardApiClient(
+        config=ClientConfig(base_url="https://example.test", max_retries=3, backoff_seconds=0),
+        consumer_key="ck",
+        keystore_path="/tmp/none",
+        keystore_password="pw",
+        signer=DummySigner(),
+    )
+
+
 def test_validate_env_and_keystore_missing(monkeypatch):
     monkeypatch.delenv("MC_CONSUMER_KEY", raising=False)
     monkeypatch.delenv("MC_KEYSTORE_PASSWORD", raising=False)
@@ -36,39 +54,19 @@ def test_validate_env_and_keystore_path_missing(monkeypatch, tmp_path: Path):
         validate_env_and_keystore()
 
 
-def test_signer_adds_authorization_header():
-    config = ClientConfig(base_url="https://example.test")
-    client = MastercardApiClient(
-        config=config,
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
-
-    with responses.RequestsMock() as rsps:
-        rsps.add(responses.GET, "https://example.test/ping", json={"ok": True}, status=200)
-        resp = client.request("GET", "/ping", allow_retry=False)
+def test_signer_adds_authorization_header(api_client, mocked_responses):
+    mocked_responses.add(responses.GET, "https://example.test/ping", json={"ok": True}, status=200)
+    resp = api_client.request("GET", "/ping", allow_retry=False)
 
     assert resp.status_code == 200
     assert resp.request.headers.get("Authorization") == "OAuth dummy"
 
 
-def test_error_mapping_from_response():
-    config = ClientConfig(base_url="https://example.test")
-    client = MastercardApiClient(
-        config=config,
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
-    )
-
-    with responses.RequestsMock() as rsps:
-        payload = {"ReasonCode": "INVALID", "Description": "Bad"}
-        rsps.add(responses.GET, "https://example.test/fail", json=payload, status=400)
-        with pytest.raises(MastercardApiError) as excinfo:
-            client.request("GET", "/fail", allow_retry=False)
+def test_error_mapping_from_response(api_client, mocked_responses):
+    payload = {"ReasonCode": "INVALID", "Description": "Bad"}
+    mocked_responses.add(responses.GET, "https://example.test/fail", json=payload, status=400)
+    with pytest.raises(MastercardApiError) as excinfo:
+        api_client.request("GET", "/fail", allow_retry=False)
 
     err = excinfo.value
     assert err.status_code == 400
@@ -76,20 +74,79 @@ def test_error_mapping_from_response():
     assert err.description == "Bad"
 
 
-def test_retry_on_server_error():
-    config = ClientConfig(base_url="https://example.test", max_retries=3, backoff_seconds=0)
-    client = MastercardApiClient(
-        config=config,
-        consumer_key="ck",
-        keystore_path="/tmp/none",
-        keystore_password="pw",
-        signer=DummySigner(),
+def test_error_description_truncates_non_json_body(api_client, mocked_responses):
+    mocked_responses.add(responses.GET, "https://example.test/html", body="<html>" + "x" * 5000, status=502)
+    with pytest.raises(MastercardApiError) as excinfo:
+        api_client.request("GET", "/html", allow_retry=False)
+
+    assert excinfo.value.description == ("<html>" + "x" * 5000)[:2000]
+
+
+def test_error_description_keeps_multibyte_characters_whole(api_client, mocked_responses):
+    body = "é" * 3000
+    mocked_responses.add(
+        responses.GET,
+        "https://example.test/accents",
+        body=body.encode("utf-8"),
+        status=502,
+        content_type="text/plain; charset=utf-8",
     )
+    with pytest.raises(MastercardApiError) as excinfo:
+        api_client.request("GET", "/accents", allow_retry=False)
+
+    assert excinfo.value.description == "é" * 2000
 
-    with responses.RequestsMock() as rsps:
-        rsps.add(responses.GET, "https://example.test/retry", status=500, json={"error": True})
-        rsps.add(responses.GET, "https://example.test/retry", status=500, json={"error": True})
-        rsps.add(responses.GET, "https://example.test/retry", status=200, json={"ok": True})
-        resp = client.request("GET", "/retry")
+
+def test_retry_on_server_error(api_client, mocked_responses):
+    mocked_responses.add(responses.GET, "https://example.test/retry", status=500, json={"error": True})
+    mocked_responses.add(responses.GET, "https://example.test/retry", status=500, json={"error": True})
+    mocked_responses.add(responses.GET, "https://example.test/retry", status=200, json={"ok": True})
+    resp = api_client.request("GET", "/retry")
 
     assert resp.status_code == 200
+
+
+def test_load_signing_key_reuses_parsed_key_until_keystore_changes(monkeypatch, tmp_path: Path):
+    keystore = tmp_path / "keystore.p12"
+    keystore.write_bytes(b"p12")
+    loads = []
+    monkeypatch.setattr(
+        mc_client.authenticationutils,
+        "load_signing_key",
+        lambda path, password: loads.append(path) or object(),
+    )
+    mc_client._load_signing_key.cache_clear()
+
+    first = load_signing_key(str(keystore), "secret")
+    assert load_signing_key(str(keystore), "secret") is first
+    assert len(loads) == 1
+
+    stat = keystore.stat()
+    os.utime(keystore, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_signing_key(str(keystore), "secret") is not first
+    assert len(loads) == 2
+    mc_client._load_signing_key.cache_clear()
+
+
+def test_from_env_shares_a_passed_session(monkeypatch, tmp_path: Path):
+    keystore = tmp_path / "keystore.p12"
+    keystore.write_bytes(b"p12")
+    monkeypatch.setenv("MC_CONSUMER_KEY", "ck")
+    monkeypatch.setenv("MC_KEYSTORE_PATH", str(keystore))
+    monkeypatch.setenv("MC_KEYSTORE_PASSWORD", "pw")
+    monkeypatch.setattr(mc_client, "load_signing_key", lambda path, password: object())
+
+    consents = MastercardApiClient.from_env("https://example.test/authentication")
+    txn = MastercardApiClient.from_env("https://example.test", session=consents.session)
+
+    assert txn.session is consents.session
+    assert MastercardApiClient.from_env("https://example.test").session is not consents.session
+
+
+def test_redact_payload_masks_nested_sensitive_fields():
+    payload = {"pan": "5555", "errors": [{"cvc": "123", "detail": {"card_number": "1", "ok": 1}}, "text"]}
+    assert _redact_payload(payload) == {
+        "pan": "[redacted]",
+        "errors": [{"cvc": "[redacted]", "detail": {"card_number": "[redacted]", "ok": 1}}, "text"],
+    }
+    assert payload["errors"][0]["cvc"] == "123"
@@ -1,33 +1,44 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import orjson
+
+from app.mc_client import MastercardApiClient
 from app.notification_service import (
+    PAYLOAD_FIELDS,
     _extract_amount_currency,
     _extract_card_reference,
     _extract_notifications,
+    _extract_payload_fields,
     _extract_value,
     _has_encrypted_payload,
+    _normalize_amount,
+    _parse_json_shared,
     _strip_sensitive,
+    canonicalize_notifications,
     enrich_notification_record,
+    fetch_undelivered_notifications,
     notification_fingerprint,
     poll_undelivered_notifications,
 )
 
 
 class DummyResponse:
+    __slots__ = ("_payload", "content")
+
     def __init__(self, payload):
         self._payload = payload
+        self.content = orjson.dumps(payload)
 
     def json(self):
         return self._payload
 
 
-class DummyClient:
-    def __init__(self, payloads):
-        self.payloads = list(payloads)
-        self.calls = 0
-
-    def request(self, *_args, **_kwargs):
-        payload = self.payloads[min(self.calls, len(self.payloads) - 1)]
-        self.calls += 1
-        return DummyResponse(payload)
+def mock_client(payloads):
+    client = Mock(spec=MastercardApiClient)
+    client.request.side_effect = [DummyResponse(payload) for payload in payloads]
+    return client
 
 
 def test_strip_sensitive_removes_pan():
@@ -37,6 +48,11 @@ def test_strip_sensitive_removes_pan():
     assert cleaned["nested"]["cardReference"] == "ref"
 
 
+def test_strip_sensitive_returns_clean_payload_uncopied():
+    payload = {"nested": [{"cardReference": "ref"}], "amount": 1}
+    assert _strip_sensitive(payload) is payload
+
+
 def test_extract_notifications_from_wrapped_payload():
     payload = {"notifications": [{"cardReference": "ref-1"}]}
     notifications = _extract_notifications(payload)
@@ -53,7 +69,7 @@ def test_poll_undelivered_backoff_and_match():
         {"notifications": []},
         {"notifications": [{"cardReference": "match-1"}]},
     ]
-    client = DummyClient(payloads)
+    client = mock_client(payloads)
     sleeps = []
 
     def fake_sleep(duration):
@@ -65,10 +81,69 @@ def test_poll_undelivered_backoff_and_match():
         max_attempts=3,
         backoff_seconds=1.0,
         sleep_fn=fake_sleep,
+        clock=lambda: 0.0,
     )
 
     assert result.found is True
     assert sleeps == [1.0]
+    assert client.request.call_count == 2
+
+
+def test_poll_undelivered_drops_repeated_notifications():
+    payloads = [
+        {"notifications": [{"id": "n1", "cardReference": "other"}, {"cardReference": "other", "amount": 1}]},
+        {"notifications": [{"id": "n1", "cardReference": "other"}, {"amount": 1, "cardReference": "other"}]},
+    ]
+    result = poll_undelivered_notifications(
+        mock_client(payloads),
+        card_reference="match-1",
+        max_attempts=2,
+        sleep_fn=lambda _duration: None,
+    )
+
+    assert result.found is False
+    assert len(result.notifications) == 2
+
+
+def test_fetch_undelivered_empty_body():
+    client = Mock(spec=MastercardApiClient)
+    client.request.return_value = SimpleNamespace(content=b"")
+    assert fetch_undelivered_notifications(client) == []
+
+
+def test_poll_undelivered_backoff_counts_request_time():
+    client = mock_client([{"notifications": []}] * 3)
+    ticks = iter([0.0, 0.4, 0.4, 2.5, 2.5])
+    sleeps = []
+
+    result = poll_undelivered_notifications(
+        client,
+        card_reference="missing",
+        max_attempts=3,
+        backoff_seconds=1.0,
+        sleep_fn=sleeps.append,
+        clock=lambda: next(ticks),
+    )
+
+    assert result.found is False
+    assert sleeps == [0.6]
+    assert client.request.call_count == 3
+
+
+def test_poll_undelivered_backoff_factor():
+    sleeps = []
+
+    poll_undelivered_notifications(
+        mock_client([{"notifications": []}] * 4),
+        card_reference="missing",
+        max_attempts=4,
+        backoff_seconds=0.25,
+        backoff_factor=3.0,
+        sleep_fn=sleeps.append,
+        clock=lambda: 0.0,
+    )
+
+    assert sleeps == [0.25, 0.75, 2.25]
 
 
 def test_extract_amount_currency_from_json_string():
@@ -96,6 +171,41 @@ def test_has_encrypted_payload_detects_nested():
     assert _has_encrypted_payload(payload) is True
 
 
+def test_extract_payload_fields_matches_single_field_extractors():
+    payload = {
+        "notifications": [
+            {"merchant": {"name": "Nested"}, "payload": "{\"cardReference\":\"ref-9\",\"amount\":\"5.00\"}"},
+            {"merchantName": "Demo Store", "currency": "EUR", "transUid": "T-1", "encryptedValue": "x"},
+        ]
+    }
+    fields = _extract_payload_fields(payload)
+    assert fields["card_reference"] == _extract_card_reference(payload) == "ref-9"
+    assert fields["merchant"] == _extract_value(payload, ("merchantName", "merchant_name", "merchant")) == {"name": "Nested"}
+    assert (fields["amount"], fields["currency"]) == _extract_amount_currency(payload) == ("5.00", None)
+    assert fields["trans_uid"] == "T-1"
+    assert fields["encrypted_payload"] is True
+    assert _extract_payload_fields(payload, ("message_type",)) == {"message_type": None}
+
+
+def test_embedded_json_parsed_once_across_extractors():
+    payload = {"payload": "{\"cardReference\":\"ref-7\",\"merchantName\":\"Cached Store\"}"}
+    _parse_json_shared.cache_clear()
+    assert _extract_card_reference(payload) == "ref-7"
+    assert _extract_value(payload, ("merchantName",)) == "Cached Store"
+    assert _has_encrypted_payload(payload) is False
+    info = _parse_json_shared.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_enrich_skips_payload_when_fields_present():
+    record = {field: "x" for field in PAYLOAD_FIELDS}
+    record.update(encrypted_payload=False, fingerprint="fp", payload="{\"merchantName\":\"Other\"}")
+    _parse_json_shared.cache_clear()
+    assert enrich_notification_record(record) is False
+    assert _parse_json_shared.cache_info().misses == 0
+    assert record["merchant"] == "x"
+
+
 def test_notification_fingerprint_prefers_trans_uid():
     record = {
         "card_reference": "card-1",
@@ -127,3 +237,23 @@ def test_enrich_notification_record_from_payload():
     assert record["reference_number"] == "123456789"
     assert record["system_trace_audit_number"] == "123456"
     assert record["fingerprint"]
+
+
+def test_canonicalize_notifications_enriches_and_dedupes():
+    records = [
+        {"id": "note-1", "payload": {"cardReference": "card-1", "transUid": "T-1"}},
+        {"id": "note-2", "trans_uid": "T-1", "card_reference": "card-1"},
+    ]
+    canonical, changed = canonicalize_notifications(records)
+    assert changed is True
+    assert len(canonical) == 1
+    assert canonical[0]["card_reference"] == "card-1"
+    assert canonical[0]["fingerprint"] == "trans_uid:T-1"
+
+
+def test_normalize_amount_matches_decimal_normalize():
+    values = ["12.50", "007", "100", "1500.00", "-0.00", "0.000001", "0.0000001", "1e3", " 12 ", "1" * 30, 12.5]
+    for value in values:
+        assert _normalize_amount(value) == str(Decimal(str(value)).normalize())
+    assert _normalize_amount("n/a") == "n/a"
+    assert _normalize_amount("") is None
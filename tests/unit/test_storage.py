@@ -1,3 +1,4 @@
+import json
 from pathlib import Path
 
 import pytest
@@ -5,8 +6,8 @@ import pytest
 from app import storage
 
 
-def test_read_list_returns_empty_when_missing(tmp_path: Path):
-    data = storage.read_list("missing.json", base_dir=tmp_path)
+def test_read_list_returns_empty_when_missing(shared_data_dir: Path):
+    data = storage.read_list("missing.json", base_dir=shared_data_dir)
     assert data == []
 
 
@@ -16,14 +17,15 @@ def test_write_and_read_list_roundtrip(tmp_path: Path):
     assert storage.read_list("items.json", base_dir=tmp_path) == items
 
 
-def test_write_list_enforces_dict_items(tmp_path: Path):
+def test_write_list_enforces_dict_items(shared_data_dir: Path):
     with pytest.raises(ValueError):
-        storage.write_list("items.json", ["not-a-dict"], base_dir=tmp_path)
+        storage.write_list("items.json", ["not-a-dict"], base_dir=shared_data_dir)
 
 
-def test_write_list_blocks_sensitive_keys(tmp_path: Path):
+def test_write_list_blocks_sensitive_keys(shared_data_dir: Path):
     with pytest.raises(ValueError):
-        storage.write_list("items.json", [{"pan": "5555"}], base_dir=tmp_path)
+        storage.write_list("items.json", [{"pan": "5555"}], base_dir=shared_data_dir)
+    assert not (shared_data_dir / "items.json").exists()
 
 
 def test_atomic_write_has_no_tmp_leftover(tmp_path: Path):
@@ -33,6 +35,20 @@ def test_atomic_write_has_no_tmp_leftover(tmp_path: Path):
     assert tmp_files == []
 
 
+def test_write_list_fsyncs_unless_durable_writes_disabled(tmp_path: Path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(storage.os, "fsync", synced.append)
+
+    monkeypatch.setenv("DATA_DURABLE_WRITES", "1")
+    storage.write_list("items.json", [{"id": 1}], base_dir=tmp_path)
+    assert len(synced) == 1
+
+    monkeypatch.setenv("DATA_DURABLE_WRITES", "0")
+    storage.write_list("items.json", [{"id": 2}], base_dir=tmp_path)
+    assert len(synced) == 1
+    assert storage.read_list("items.json", base_dir=tmp_path) == [{"id": 2}]
+
+
 def test_dataset_helpers_use_expected_files(tmp_path: Path):
     storage.save_enrollments([{"id": "e1"}], base_dir=tmp_path)
     assert (tmp_path / storage.ENROLLMENTS_FILE).exists()
@@ -40,10 +56,28 @@ def test_dataset_helpers_use_expected_files(tmp_path: Path):
     assert (tmp_path / storage.TRANSACTIONS_FILE).exists()
     storage.save_notifications([{"id": "n1"}], base_dir=tmp_path)
     assert (tmp_path / storage.NOTIFICATIONS_FILE).exists()
-    storage.save_pending_enrollments([{"id": "p1"}], base_dir=tmp_path)
+    storage.save_pending_enrollments([{"state": "p1"}], base_dir=tmp_path)
     assert (tmp_path / storage.PENDING_ENROLLMENTS_FILE).exists()
 
 
+def test_pending_enrollments_round_trip_and_reject_bad_states_on_save(tmp_path: Path):
+    items = [{"state": "s1", "consent_name": "notification"}, {"state": "s2"}]
+    storage.save_pending_enrollments(items, base_dir=tmp_path)
+    assert storage.load_pending_enrollments(base_dir=tmp_path) == items
+
+    with pytest.raises(ValueError, match="state"):
+        storage.save_pending_enrollments([{"id": "p1"}], base_dir=tmp_path)
+    with pytest.raises(ValueError, match="Duplicate state"):
+        storage.save_pending_enrollments([{"state": "s1"}, {"state": "s1", "id": "p2"}], base_dir=tmp_path)
+    assert storage.load_pending_enrollments(base_dir=tmp_path) == items
+
+
+def test_legacy_pending_enrollments_skip_bad_states_on_read(tmp_path: Path):
+    legacy = [{"id": "p1"}, {"state": "s1", "id": "p2"}, {"state": "s1", "id": "p3"}]
+    storage.write_list(storage.PENDING_ENROLLMENTS_FILE, legacy, base_dir=tmp_path)
+    assert storage.load_pending_enrollments_by_state(base_dir=tmp_path) == {"s1": {"state": "s1", "id": "p3"}}
+
+
 def test_load_enrollments_deduplicates(tmp_path: Path):
     items = [
         {
@@ -67,3 +101,305 @@ def test_load_enrollments_deduplicates(tmp_path: Path):
     assert deduped[0]["status"] == "EXPIRED"
     raw = storage.read_list(storage.ENROLLMENTS_FILE, base_dir=tmp_path)
     assert len(raw) == 1
+
+
+def test_read_list_cache_returns_copies_and_invalidates_on_write(tmp_path: Path):
+    storage.write_list("items.json", [{"id": "1"}], base_dir=tmp_path)
+    first = storage.read_list("items.json", base_dir=tmp_path)
+    first.append({"id": "local"})
+    assert storage.read_list("items.json", base_dir=tmp_path) == [{"id": "1"}]
+
+    storage.write_list("items.json", [{"id": "2"}], base_dir=tmp_path)
+    assert storage.read_list("items.json", base_dir=tmp_path) == [{"id": "2"}]
+
+
+def test_views_cached_tracks_reads_and_writes(tmp_path: Path):
+    files = (storage.TRANSACTIONS_FILE, storage.NOTIFICATIONS_FILE, storage.NOTIFICATIONS_LOG_FILE)
+    storage.save_transactions([{"id": "t1"}], base_dir=tmp_path)
+    assert not storage.views_cached(files, base_dir=tmp_path)
+
+    storage.load_transactions(base_dir=tmp_path)
+    storage.load_notifications(base_dir=tmp_path)
+    assert storage.views_cached(files, base_dir=tmp_path)
+
+    storage.append_notifications([{"id": "n1"}], base_dir=tmp_path)
+    assert not storage.views_cached(files, base_dir=tmp_path)
+
+
+def test_loaded_records_can_be_mutated_without_touching_the_cache(tmp_path: Path):
+    storage.save_transactions([{"id": "t1"}], base_dir=tmp_path)
+    storage.save_enrollments([{"card_reference": "ref-1"}], base_dir=tmp_path)
+    storage.save_notifications([{"id": "n1"}], base_dir=tmp_path, version=1)
+    storage.append_notifications([{"id": "n2"}], base_dir=tmp_path)
+    storage.save_pending_enrollments([{"state": "s1"}], base_dir=tmp_path)
+
+    storage.load_transactions(base_dir=tmp_path)[0]["_match_key"] = "k"
+    storage.load_enrollments(base_dir=tmp_path)[0]["status"] = "APPROVED"
+    storage.load_enrollment_index(base_dir=tmp_path).items[0]["card_alias"] = "alias"
+    for record in storage.load_notifications(base_dir=tmp_path):
+        record["merchant"] = "Shop"
+    storage.load_pending_enrollments_by_state(base_dir=tmp_path)["s1"]["return_url"] = "/"
+
+    assert storage.load_transactions(base_dir=tmp_path) == [{"id": "t1"}]
+    assert storage.load_enrollments(base_dir=tmp_path) == [{"card_reference": "ref-1"}]
+    assert storage.load_enrollment_index(base_dir=tmp_path).items == [{"card_reference": "ref-1"}]
+    assert storage.load_notifications(base_dir=tmp_path) == [{"id": "n1"}, {"id": "n2"}]
+    assert storage.load_pending_enrollments(base_dir=tmp_path) == [{"state": "s1"}]
+
+
+def _linear_find(enrollments: list, record: dict) -> int | None:
+    record_ref = record.get("card_reference")
+    if record_ref:
+        for idx, existing in enumerate(enrollments):
+            if existing.get("card_reference") == record_ref:
+                return idx
+    record_last4 = record.get("pan_last4")
+    record_alias = record.get("card_alias")
+    if record_last4:
+        for idx, existing in enumerate(enrollments):
+            if existing.get("pan_last4") != record_last4:
+                continue
+            existing_alias = existing.get("card_alias")
+            if record_alias and existing_alias and record_alias != existing_alias:
+                continue
+            return idx
+    record_consent = record.get("consent_id") or record.get("id")
+    if record_consent:
+        for idx, existing in enumerate(enrollments):
+            if existing.get("consent_id") == record_consent or existing.get("id") == record_consent:
+                return idx
+    return None
+
+
+def test_enrollment_index_matches_linear_lookup(tmp_path: Path):
+    items = [
+        {"id": "c1", "consent_id": "c1", "card_reference": "ref-1", "pan_last4": "0297", "card_alias": "A - 0297"},
+        {"id": "c2", "consent_id": "c2", "card_reference": "ref-2", "pan_last4": "0297", "card_alias": "B - 0297"},
+        {"id": "c3", "consent_id": "c3", "card_reference": None, "pan_last4": None},
+    ]
+    storage.save_enrollments(items, base_dir=tmp_path)
+    index = storage.load_enrollment_index(base_dir=tmp_path)
+    stored = storage.load_enrollments(base_dir=tmp_path)
+    probes = [
+        {"card_reference": "ref-2"},
+        {"pan_last4": "0297", "card_alias": "B - 0297"},
+        {"pan_last4": "0297"},
+        {"consent_id": "c3"},
+        {"id": "missing"},
+    ]
+    for probe in probes:
+        assert index.find(probe) == _linear_find(stored, probe)
+
+    index.upsert({"card_reference": "ref-4", "pan_last4": "4444"})
+    assert index.get_by_card_reference("ref-4")["pan_last4"] == "4444"
+    assert storage.load_enrollment_index(base_dir=tmp_path).get_by_card_reference("ref-4") is None
+
+
+def test_dedupe_enrollments_matches_linear_dedupe():
+    items = [
+        {"card_reference": "ref-1", "pan_last4": "0297", "card_alias": "A - 0297", "created_at": "2026-02-01T00:00:00Z"},
+        {"consent_id": "c2", "pan_last4": "0297", "card_alias": "B - 0297", "created_at": "2026-02-01T00:00:00Z"},
+        {"card_reference": "ref-2", "consent_id": "c2", "created_at": "2026-02-03T00:00:00Z"},
+        {"pan_last4": "0297", "status": "EXPIRED", "created_at": "2026-01-01T00:00:00Z"},
+        {"id": "c3", "created_at": 5},
+        {"consent_id": "c3", "card_reference": "ref-1", "created_at": "2026-02-02T00:00:00+00:00"},
+        "not-a-record",
+    ]
+    expected: list = []
+    for record in items:
+        if not isinstance(record, dict):
+            continue
+        idx = _linear_find(expected, record)
+        if idx is None:
+            expected.append(record)
+        elif storage._parse_created_at(record.get("created_at")) >= storage._parse_created_at(
+            expected[idx].get("created_at")
+        ):
+            expected[idx] = {**expected[idx], **record}
+    assert storage._dedupe_enrollments(items) == expected
+
+
+def test_enrollment_index_card_labels(tmp_path: Path):
+    storage.save_enrollments(
+        [
+            {"id": "c1", "consent_id": "c1", "card_reference": "ref-1", "card_alias": "John - 0297"},
+            {"id": "c2", "consent_id": "c2", "card_reference": None},
+        ],
+        base_dir=tmp_path,
+    )
+    index = storage.load_enrollment_index(base_dir=tmp_path)
+    assert index.card_labels == {"ref-1": "John - 0297", "c2": "c2"}
+
+    index.upsert({"card_reference": "ref-1", "card_alias": "Renamed"})
+    assert index.card_labels["ref-1"] == "Renamed"
+    assert storage.load_enrollment_index(base_dir=tmp_path).card_labels["ref-1"] == "John - 0297"
+
+
+def test_save_enrollment_index_primes_cache(tmp_path: Path):
+    storage.save_enrollments([{"id": "c1", "card_reference": "ref-1"}], base_dir=tmp_path)
+    index = storage.load_enrollment_index(base_dir=tmp_path)
+    index.upsert({"id": "c2", "card_reference": "ref-2"})
+    storage.save_enrollment_index(index, base_dir=tmp_path)
+
+    index.upsert({"id": "c3", "card_reference": "ref-3"})
+    reloaded = storage.load_enrollment_index(base_dir=tmp_path)
+    assert reloaded.get_by_card_reference("ref-2")["id"] == "c2"
+    assert reloaded.get_by_card_reference("ref-3") is None
+
+    storage._CACHE.clear()
+    assert [item["id"] for item in storage.load_enrollments(base_dir=tmp_path)] == ["c1", "c2"]
+
+
+def test_notifications_versioned_roundtrip(tmp_path: Path):
+    storage.save_notifications([{"id": "n1"}], base_dir=tmp_path)
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == ([{"id": "n1"}], 0)
+
+    storage.save_notifications([{"id": "n2"}], base_dir=tmp_path, version=3)
+    raw = json.loads((tmp_path / storage.NOTIFICATIONS_FILE).read_text())
+    assert raw == {"version": 3, "items": [{"id": "n2"}]}
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == ([{"id": "n2"}], 3)
+    assert storage.load_notifications(base_dir=tmp_path) == [{"id": "n2"}]
+
+
+def test_pending_authentications_keyed_by_state(tmp_path: Path):
+    legacy = [{"state": "s1", "card_reference": "ref-1"}, {"state": "s2", "card_reference": "ref-2"}]
+    storage.write_list(storage.PENDING_AUTH_FILE, legacy, base_dir=tmp_path)
+    by_state = storage.load_pending_authentications_by_state(base_dir=tmp_path)
+    assert by_state["s2"]["card_reference"] == "ref-2"
+
+    by_state.pop("s1")
+    storage.save_pending_authentications_by_state(by_state, base_dir=tmp_path)
+    raw = json.loads((tmp_path / storage.PENDING_AUTH_FILE).read_text())
+    assert raw == {"s2": {"state": "s2", "card_reference": "ref-2"}}
+    assert storage.load_pending_authentications(base_dir=tmp_path) == [legacy[1]]
+
+
+def test_pending_authentications_skip_bad_legacy_entries(tmp_path: Path):
+    legacy = [
+        {"state": "s1", "card_reference": "ref-1"},
+        {"card_reference": "ref-2"},
+        {"state": "s3", "card_reference": "ref-3"},
+        {"state": "s3", "card_reference": "ref-4"},
+    ]
+    storage.write_list(storage.PENDING_AUTH_FILE, legacy, base_dir=tmp_path)
+    assert storage.load_pending_authentications_by_state(base_dir=tmp_path) == {
+        "s1": {"state": "s1", "card_reference": "ref-1"},
+        "s3": {"state": "s3", "card_reference": "ref-4"},
+    }
+    assert json.loads((tmp_path / storage.PENDING_AUTH_FILE).read_text()) == legacy
+
+    with pytest.raises(ValueError, match="Duplicate state"):
+        storage.save_pending_authentications([{"state": "s1"}, {"state": "s1"}], base_dir=tmp_path)
+
+
+def test_notification_index_persists_until_notifications_change(tmp_path: Path):
+    records = [{"id": "n1", "fingerprint": "fp-1"}, {"id": 7, "fingerprint": "fp-2"}]
+    id_index, fingerprint_index = storage.build_notification_index(records)
+    assert id_index == {"n1": 0, "7": 1}
+    storage.save_notifications_indexed(records, id_index, fingerprint_index, base_dir=tmp_path, version=1)
+
+    loaded, _ = storage.load_notifications_versioned(base_dir=tmp_path)
+    index_path = tmp_path / storage.NOTIFICATIONS_INDEX_FILE
+    assert storage.load_notification_index(loaded, base_dir=tmp_path) == (id_index, fingerprint_index)
+
+    # A write that bypasses the index makes it stale; it is rebuilt from the records.
+    storage.save_notifications([{"id": "n3", "fingerprint": "fp-3"}], base_dir=tmp_path)
+    assert index_path.exists()
+    reloaded = storage.load_notifications(base_dir=tmp_path)
+    assert storage.load_notification_index(reloaded, base_dir=tmp_path) == ({"n3": 0}, {"fp-3": 0})
+
+
+def test_notification_log_replays_over_snapshot_and_compacts(tmp_path: Path):
+    records = [{"id": "n1", "amount": "1"}, {"id": "n2", "amount": "2"}]
+    storage.save_notifications(records, base_dir=tmp_path, version=1)
+
+    updated = {"id": "n1", "amount": "1", "merchant": "SHOP"}
+    added = {"id": "n3", "amount": "3"}
+    current = [updated, records[1], added]
+    id_index, fingerprint_index = storage.build_notification_index(current)
+    storage.save_notifications_indexed(
+        current, id_index, fingerprint_index, base_dir=tmp_path, version=1, changed=[updated, added]
+    )
+    log_path = tmp_path / storage.NOTIFICATIONS_LOG_FILE
+    assert len(log_path.read_bytes().splitlines()) == 2
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == (current, 1)
+    assert storage.load_notification_index(current, base_dir=tmp_path) == (id_index, fingerprint_index)
+
+    # Repeated rewrites of n1 push snapshot + log past twice the live count.
+    for merchant in ("SHOP 2", "SHOP 3", "SHOP 4"):
+        current[0] = {**updated, "merchant": merchant}
+        storage.save_notifications_indexed(
+            current, id_index, fingerprint_index, base_dir=tmp_path, version=1, changed=[current[0]]
+        )
+    assert not log_path.exists()
+    assert storage.load_notifications(base_dir=tmp_path) == current
+
+
+def test_merged_notifications_cached_until_snapshot_or_log_changes(tmp_path: Path, monkeypatch):
+    merges = []
+    merge = storage._merge_notification_log
+    monkeypatch.setattr(storage, "_merge_notification_log", lambda data_dir: merges.append(1) or merge(data_dir))
+
+    storage.save_notifications([{"id": "n1"}], base_dir=tmp_path, version=1)
+    storage.append_notifications([{"id": "n2"}], base_dir=tmp_path)
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == ([{"id": "n1"}, {"id": "n2"}], 1)
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == ([{"id": "n1"}, {"id": "n2"}], 1)
+    assert len(merges) == 1
+
+    storage.append_notifications([{"id": "n3"}], base_dir=tmp_path)
+    assert storage.load_notifications(base_dir=tmp_path) == [{"id": "n1"}, {"id": "n2"}, {"id": "n3"}]
+    storage.save_notifications([{"id": "n4"}], base_dir=tmp_path, version=2)
+    assert storage.load_notifications_versioned(base_dir=tmp_path) == ([{"id": "n4"}], 2)
+    assert len(merges) == 3
+
+
+def test_notification_log_compacts_when_polls_only_add(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "NOTIFICATIONS_LOG_MAX_RECORDS", 3)
+    current = [{"id": "n0"}]
+    storage.save_notifications(current, base_dir=tmp_path, version=1)
+    log_path = tmp_path / storage.NOTIFICATIONS_LOG_FILE
+
+    for number in range(1, 5):
+        record = {"id": f"n{number}"}
+        current.append(record)
+        id_index, fingerprint_index = storage.build_notification_index(current)
+        storage.save_notifications_indexed(
+            current, id_index, fingerprint_index, base_dir=tmp_path, version=1, changed=[record]
+        )
+        if number <= 3:
+            assert len(log_path.read_bytes().splitlines()) == number
+
+    assert not log_path.exists()
+    assert storage.read_versioned_list(storage.NOTIFICATIONS_FILE, base_dir=tmp_path) == (current, 1)
+
+
+def test_notification_log_compacts_past_byte_limit(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(storage, "NOTIFICATIONS_LOG_MAX_BYTES", 64)
+    current = [{"id": "n0"}]
+    storage.save_notifications(current, base_dir=tmp_path, version=1)
+    log_path = tmp_path / storage.NOTIFICATIONS_LOG_FILE
+
+    for number in range(1, 3):
+        record = {"id": f"n{number}", "merchant": "x" * 40}
+        current.append(record)
+        id_index, fingerprint_index = storage.build_notification_index(current)
+        storage.save_notifications_indexed(
+            current, id_index, fingerprint_index, base_dir=tmp_path, version=1, changed=[record]
+        )
+        assert log_path.exists() is (number == 1)
+
+    assert storage.load_notifications(base_dir=tmp_path) == current
+
+
+def test_notification_log_skips_and_truncates_torn_last_line(tmp_path: Path):
+    storage.save_notifications([{"id": "n1"}], base_dir=tmp_path, version=1)
+    storage.append_notifications([{"id": "n2"}], base_dir=tmp_path)
+    log_path = tmp_path / storage.NOTIFICATIONS_LOG_FILE
+    with log_path.open("ab") as handle:
+        handle.write(b'{"id": "n3", "amo')
+
+    assert storage.load_notifications(base_dir=tmp_path) == [{"id": "n1"}, {"id": "n2"}]
+
+    storage.append_notifications([{"id": "n4"}], base_dir=tmp_path)
+    assert log_path.read_bytes() == b'{"id":"n2"}\n{"id":"n4"}\n'
+    assert storage.load_notifications(base_dir=tmp_path) == [{"id": "n1"}, {"id": "n2"}, {"id": "n4"}]
@@ -1,7 +1,9 @@
 import pytest
 
+from app.notification_service import notification_match_key
 from app.transaction_service import (
     build_transaction_payload,
+    build_transaction_record,
     generate_transaction_identifiers,
     parse_transaction_input,
 )
@@ -19,22 +21,27 @@ def test_parse_transaction_input_success():
     assert txn.currency == "USD"
 
 
-def test_parse_transaction_input_missing():
-    with pytest.raises(ValueError):
-        parse_transaction_input({})
-
-
-def test_parse_transaction_input_invalid_amount():
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {},
+        {"card_reference": "ref-1", "amount": "-1", "currency": "USD", "merchant": "Shop"},
+    ],
+    ids=["missing", "invalid_amount"],
+)
+def test_parse_transaction_input_rejects(payload):
     with pytest.raises(ValueError):
-        parse_transaction_input(
-            {"card_reference": "ref-1", "amount": "-1", "currency": "USD", "merchant": "Shop"}
-        )
+        parse_transaction_input(payload)
 
 
-def test_build_transaction_payload():
-    txn = parse_transaction_input(
+@pytest.fixture(scope="module")
+def txn():
+    return parse_transaction_input(
         {"card_reference": "ref-1", "amount": "12.34", "currency": "USD", "merchant": "Shop"}
     )
+
+
+def test_build_transaction_payload(txn):
     payload = build_transaction_payload(
         txn,
         reference_number="123456789",
@@ -52,3 +59,12 @@ def test_generate_transaction_identifiers():
     assert identifiers.system_trace_audit_number.isdigit()
     assert len(identifiers.reference_number) == 9
     assert len(identifiers.system_trace_audit_number) == 6
+
+
+def test_build_transaction_record_caches_match_key():
+    txn = parse_transaction_input(
+        {"card_reference": "ref-1", "amount": "12.30", "currency": "usd", "merchant": "Shop"}
+    )
+    record = build_transaction_record(txn, status="POSTED")
+    note = {"card_reference": "ref-1", "amount": 12.3, "currency": "USD", "merchant": "shop "}
+    assert record["_match_key"] == notification_match_key(note)